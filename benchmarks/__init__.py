@@ -0,0 +1,12 @@
+"""ベンチマーク・負荷試験用のパッケージ。
+
+srcの設定は初回利用時に環境変数から読み込まれるため、DATABASE_URLが未指定であれば
+ここで一時ディレクトリのSQLiteを割り当てる。既存のDBを対象にする場合は
+DATABASE_URLを指定して実行する。
+"""
+import os
+import tempfile
+
+if "DATABASE_URL" not in os.environ:
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='pysavor-bench-')}/bench.db"
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
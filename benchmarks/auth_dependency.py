@@ -0,0 +1,72 @@
+"""get_current_userの依存解決を、キャッシュ有無の条件ごとに計測する。
+
+    uv run python -m benchmarks.auth_dependency --iterations 5000
+"""
+import argparse
+import asyncio
+import time
+
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import security
+from src.api import deps
+from src.db import get_async_engine, get_engine
+from src.models.user import User
+from src.repositories.user import get_principal_cache
+
+
+def _setup() -> str:
+    SQLModel.metadata.create_all(get_engine())
+    with Session(get_engine()) as session:
+        user = User(email="bench@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        return security.create_access_token(subject=user.id)
+
+
+CONDITIONS = {
+    "uncached": {"token_cache": False, "user_cache": False},
+    "token cache": {"token_cache": True, "user_cache": False},
+    "token + principal cache": {"token_cache": True, "user_cache": True},
+}
+
+
+async def measure_get_current_user(
+    token: str, iterations: int, *, token_cache: bool, user_cache: bool
+) -> float:
+    """get_current_userの1回あたりの所要時間(秒)を返す。"""
+    async def resolve() -> None:
+        if not token_cache:
+            security.get_token_cache().clear()
+        if not user_cache:
+            get_principal_cache().clear()
+        async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+            await deps.get_current_user(session=session, token=token)
+
+    await resolve()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await resolve()
+    return (time.perf_counter() - started) / iterations
+
+
+async def _run_all(token: str, iterations: int) -> None:
+    for label, condition in CONDITIONS.items():
+        seconds = await measure_get_current_user(token, iterations, **condition)
+        print(f"{label:<24} {seconds * 1e6:10.1f} us/op")
+    await get_async_engine().dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    token = _setup()
+    asyncio.run(_run_all(token, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
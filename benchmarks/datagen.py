@@ -0,0 +1,136 @@
+"""シード固定で、ユーザー・Issue・コラボレーターの合成データを生成する。
+
+    DATABASE_URL=sqlite:///data/bench.db uv run python -m benchmarks.datagen \
+        --users 100000 --issues 1000000 --collaborators 2 --seed 42
+
+生成されるユーザーのパスワードはすべてDATASET_PASSWORD。
+"""
+import argparse
+import random
+from array import array
+import time
+from dataclasses import dataclass
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import func, insert, select, text
+from sqlmodel import Session
+
+from src.db import get_engine
+from src.models.collaborator import Collaborator
+from src.models.issue import Issue
+from src.models.user import User
+from src.repositories.issue import IssueRepository
+from src.security import get_password_hash
+
+DATASET_PASSWORD = "benchmark-password"
+CHUNK_SIZE = 10000
+
+WORDS = (
+    "login", "crash", "timeout", "cache", "search", "export", "import", "button",
+    "layout", "session", "token", "database", "index", "migration", "latency",
+    "memory", "upload", "download", "report", "filter", "permission", "invite",
+    "notification", "settings", "profile", "billing", "sync", "offline", "retry",
+)
+
+
+@dataclass(frozen=True)
+class Scale:
+    users: int
+    issues: int
+    collaborators: int
+    seed: int = 42
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _insert_chunks(connection, table, rows) -> None:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= CHUNK_SIZE:
+            connection.execute(insert(table), chunk)
+            chunk = []
+    if chunk:
+        connection.execute(insert(table), chunk)
+
+
+def generate(scale: Scale) -> None:
+    rng = random.Random(scale.seed)
+    # bcryptは1件だけ計算し、全ユーザーで共有する
+    hashed_password = get_password_hash(DATASET_PASSWORD)
+
+    def users():
+        for user_id in range(1, scale.users + 1):
+            yield {
+                "id": user_id,
+                "email": f"user{user_id}@example.com",
+                "full_name": f"User {user_id}",
+                "hashed_password": hashed_password,
+            }
+
+    owners = array("l")
+
+    def issues():
+        for issue_id in range(1, scale.issues + 1):
+            owner_id = rng.randint(1, scale.users)
+            owners.append(owner_id)
+            yield {
+                "id": issue_id,
+                "title": _sentence(rng, rng.randint(2, 6)),
+                "description": _sentence(rng, rng.randint(5, 30)),
+                "owner_id": owner_id,
+            }
+
+    def collaborators():
+        for issue_id, owner_id in enumerate(owners, start=1):
+            count = min(rng.randint(0, 2 * scale.collaborators), scale.users - 1)
+            for user_id in rng.sample(range(1, scale.users + 1), count):
+                if user_id != owner_id:
+                    yield {"issue_id": issue_id, "user_id": user_id}
+
+    with get_engine().begin() as connection:
+        _insert_chunks(connection, User.__table__, users())
+        _insert_chunks(connection, Issue.__table__, issues())
+        _insert_chunks(connection, Collaborator.__table__, collaborators())
+    # issue_accessは挿入済みの行から一括で展開する
+    with Session(get_engine()) as session:
+        IssueRepository().rebuild_access(session)
+    with get_engine().begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+
+def migrate() -> None:
+    command.upgrade(Config("alembic.ini"), "head")
+
+
+def ensure_dataset(scale: Scale) -> bool:
+    """DBにユーザーが1件もなければマイグレーションと生成を行う。生成した場合はTrue。"""
+    migrate()
+    with get_engine().connect() as connection:
+        existing = connection.execute(select(func.count()).select_from(User)).scalar_one()
+    if existing:
+        return False
+    generate(scale)
+    return True
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--issues", type=int, default=10000)
+    parser.add_argument("--collaborators", type=int, default=2, help="Issueあたりの平均コラボレーター数")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    scale = Scale(users=args.users, issues=args.issues, collaborators=args.collaborators, seed=args.seed)
+    started = time.perf_counter()
+    migrate()
+    generate(scale)
+    print(f"generated {scale} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""GET /api/v1/issues/me/exportのピークメモリが行数によらず一定であることを確認する。
+
+    uv run python -m benchmarks.export_memory --rows 500000 --budget-mb 32
+
+1人のユーザーが所有する`--rows`件のIssueを一時DBに生成し、ASGIアプリを直接呼び出して
+レスポンスを読み捨てながら、tracemallocでエクスポート中のピークを計測する。
+(httpxのASGITransportはボディ全体を溜めるため使わない。)
+ピークが予算を超えるか、出力行数が一致しなければ終了コード1で終わる。
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+from pathlib import Path
+
+from benchmarks.datagen import Scale, generate, migrate
+from benchmarks.report import write_results
+from src import security
+from src.db import dispose_engines
+from src.main import create_app
+
+COOKIE_NAME = "pysavor_access_token"
+PATH = "/api/v1/issues/me/export"
+
+
+async def _export(app, *, compress: bool) -> dict[str, float]:
+    token = security.create_access_token(subject=1)
+    headers = [
+        (b"cookie", f"{COOKIE_NAME}={token}".encode()),
+        (b"accept-encoding", b"gzip" if compress else b"identity"),
+    ]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": PATH,
+        "raw_path": PATH.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": headers,
+        "client": ("127.0.0.1", 0),
+        "server": ("export-check", 80),
+    }
+    decompressor = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    result = {"status": 0, "bytes": 0, "lines": 0}
+
+    requested = False
+    finished = asyncio.Event()
+
+    async def receive():
+        # StreamingResponseは切断を待ち受けるため、本文の後はレスポンス完了までブロックする
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            result["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            body = message.get("body", b"")
+            result["bytes"] += len(body)
+            if decompressor:
+                body = decompressor.decompress(body)
+            result["lines"] += body.count(b"\n")
+            if not message.get("more_body", False):
+                finished.set()
+
+    started = time.perf_counter()
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    await app(scope, receive, send)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result["seconds"] = time.perf_counter() - started
+    result["peak_mb"] = peak / (1024 * 1024)
+    return result
+
+
+async def _run() -> dict[str, dict[str, float]]:
+    app = create_app()
+    try:
+        return {
+            "identity": await _export(app, compress=False),
+            "gzip": await _export(app, compress=True),
+        }
+    finally:
+        await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--budget-mb", type=float, default=32.0)
+    parser.add_argument("--output", help="結果のJSONを書き出すパス(省略時は標準出力)")
+    args = parser.parse_args()
+
+    directory = Path(tempfile.mkdtemp(prefix="pysavor-export-"))
+    # 設定は初回利用時に読み込まれるため、ここで環境変数を差し替えれば反映される
+    os.environ["DATABASE_URL"] = f"sqlite:///{directory / 'export.db'}"
+    migrate()
+    generate(Scale(users=1, issues=args.rows, collaborators=0))
+
+    results = asyncio.run(_run())
+    write_results(args.output, "export_memory", results, rows=args.rows, budget_mb=args.budget_mb)
+
+    failed = False
+    for name, result in results.items():
+        if result["status"] != 200 or result["lines"] != args.rows:
+            print(f"{name}: status {result['status']}, {result['lines']} lines (expected {args.rows})")
+            failed = True
+        if result["peak_mb"] > args.budget_mb:
+            print(f"{name}: peak {result['peak_mb']:.1f}MB exceeds budget {args.budget_mb:.1f}MB")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""`python -X importtime`で`src.main`のインポート時間を計測し、予算と比較する。
+
+    uv run python -m benchmarks.import_time --runs 5 --budget-ms 2000 --output results/import_time.json
+
+DATABASE_URLやSECRET_KEYを渡さずにインポートし、インポートだけでは設定の読み込みや
+エンジンの生成が行われないことも確認する。予算超過または遅延の崩れがあれば終了コード1で終わる。
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.report import write_results
+
+ROOT = Path(__file__).resolve().parent.parent
+TARGET = "src.main"
+
+LAZINESS_CHECK = """
+import src.main
+from src import change_feed, db, jobs, security, settings
+from src.repositories import user
+print(
+    settings.get_settings.cache_info().currsize,
+    db.get_engine.cache_info().currsize,
+    db.get_async_engine.cache_info().currsize,
+    security.get_token_cache.cache_info().currsize,
+    security.get_password_hasher.cache_info().currsize,
+    user.get_principal_cache.cache_info().currsize,
+    change_feed.get_change_feed.cache_info().currsize,
+    jobs.get_job_runner.cache_info().currsize,
+)
+"""
+
+
+def _clean_env() -> dict[str, str]:
+    env = dict(os.environ)
+    for name in ("DATABASE_URL", "ASYNC_DATABASE_URL", "SECRET_KEY"):
+        env.pop(name, None)
+    return env
+
+
+def _parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """モジュール名 -> (self_us, cumulative_us)。"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def measure_once() -> dict[str, tuple[int, int]]:
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {TARGET}"],
+        cwd=ROOT,
+        env=_clean_env(),
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {TARGET} failed:\n{completed.stderr[-2000:]}")
+    return _parse_importtime(completed.stderr)
+
+
+def check_laziness() -> bool:
+    completed = subprocess.run(
+        [sys.executable, "-c", LAZINESS_CHECK],
+        cwd=ROOT,
+        env=_clean_env(),
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        print(completed.stderr[-2000:])
+        return False
+    return all(count == "0" for count in completed.stdout.split())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=2000.0)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--output", help="結果のJSONを書き出すパス(省略時は標準出力)")
+    args = parser.parse_args()
+
+    runs = [measure_once() for _ in range(args.runs)]
+    totals_ms = [run[TARGET][1] / 1000 for run in runs]
+    median_ms = statistics.median(totals_ms)
+
+    last = runs[-1]
+    slowest = sorted(last.items(), key=lambda item: item[1][0], reverse=True)[: args.top]
+    project = {
+        name: cumulative / 1000 for name, (_, cumulative) in last.items() if name.startswith("src")
+    }
+    lazy = check_laziness()
+
+    results = {
+        "median_ms": median_ms,
+        "runs_ms": totals_ms,
+        "within_budget": median_ms <= args.budget_ms,
+        "lazy_settings_and_engine": lazy,
+        "slowest_self_ms": {name: self_us / 1000 for name, (self_us, _) in slowest},
+        "project_cumulative_ms": dict(sorted(project.items(), key=lambda item: -item[1])),
+    }
+    write_results(args.output, "import_time", results, runs=args.runs, budget_ms=args.budget_ms)
+
+    if median_ms > args.budget_ms:
+        print(f"import {TARGET}: {median_ms:.1f}ms exceeds budget {args.budget_ms:.1f}ms")
+        sys.exit(1)
+    if not lazy:
+        print(f"import {TARGET} constructed settings, engines or caches eagerly")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
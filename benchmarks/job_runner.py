@@ -0,0 +1,150 @@
+"""一時DBでジョブランナーを動かし、再試行・失敗・シャットダウン時の退避を確認する。
+
+    uv run python -m benchmarks.job_runner
+
+次を確認し、外れれば終了コード1で終わる。
+
+- ロールバックされたトランザクションで登録したジョブは残らない
+- 成功したジョブはテーブルから削除される
+- 失敗したジョブはバックオフを挟んで再試行され、成功すれば削除される
+- 再試行を使い切ったジョブはfailedとして最終エラーとともに残る
+- drainは実行中のジョブの完了を待つ
+- drainの期限を過ぎたジョブは中断され、pendingに戻る
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.datagen import migrate
+from src.db import dispose_engines, get_async_engine
+from src.jobs import JobRunner
+from src.models.job import JOB_FAILED, JOB_PENDING, Job
+
+RETRY_BASE = 0.05
+
+
+async def _wait_until(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if await predicate():
+            return True
+        await asyncio.sleep(0.02)
+    return False
+
+
+async def _jobs() -> dict[int, Job]:
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        results = await session.exec(select(Job))
+        return {job.id: job for job in results.all()}
+
+
+async def _run() -> list[tuple[str, bool]]:
+    checks: list[tuple[str, bool]] = []
+    calls: dict[str, list[float]] = {"ok": [], "flaky": [], "broken": []}
+    finished: list[int] = []
+
+    async def ok(payload):
+        calls["ok"].append(time.monotonic())
+
+    async def flaky(payload):
+        calls["flaky"].append(time.monotonic())
+        if len(calls["flaky"]) < 3:
+            raise RuntimeError("temporary failure")
+
+    async def broken(payload):
+        calls["broken"].append(time.monotonic())
+        raise ValueError(f"cannot process {payload['value']}")
+
+    async def slow(payload):
+        await asyncio.sleep(payload["seconds"])
+        finished.append(payload["seconds"])
+
+    handlers = {"ok": ok, "flaky": flaky, "broken": broken, "slow": slow}
+    runner = JobRunner(
+        handlers=handlers,
+        workers=2,
+        poll_interval=0.5,
+        max_attempts=3,
+        retry_base=RETRY_BASE,
+        retry_max=1.0,
+        lease=60.0,
+    )
+    runner.start()
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        discarded_id = await runner.enqueue(session, name="ok", payload={})
+        await session.rollback()
+    checks.append(("rolled back job is not stored", discarded_id not in await _jobs()))
+
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        ok_id = await runner.enqueue(session, name="ok", payload={})
+        flaky_id = await runner.enqueue(session, name="flaky", payload={})
+        broken_id = await runner.enqueue(session, name="broken", payload={"value": 42})
+        await session.commit()
+
+    async def settled() -> bool:
+        jobs = await _jobs()
+        return ok_id not in jobs and flaky_id not in jobs and jobs[broken_id].status == JOB_FAILED
+
+    checks.append(("jobs settle", await _wait_until(settled)))
+    jobs = await _jobs()
+    checks.append(("succeeded job is deleted", ok_id not in jobs and len(calls["ok"]) == 1))
+    flaky_gaps = [b - a for a, b in zip(calls["flaky"], calls["flaky"][1:])]
+    checks.append((
+        "flaky job retried with backoff",
+        flaky_id not in jobs
+        and len(calls["flaky"]) == 3
+        and all(gap >= RETRY_BASE * 2**attempt for attempt, gap in enumerate(flaky_gaps)),
+    ))
+    broken = jobs.get(broken_id)
+    checks.append((
+        "exhausted job is kept as failed",
+        broken is not None
+        and broken.attempts == 3
+        and len(calls["broken"]) == 3
+        and "cannot process 42" in (broken.last_error or ""),
+    ))
+
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        await runner.enqueue(session, name="slow", payload={"seconds": 0.3})
+        await session.commit()
+    await asyncio.sleep(0.1)
+    await runner.drain(timeout=5.0)
+    checks.append(("drain waits for running job", finished == [0.3]))
+
+    runner.start()
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        stuck_id = await runner.enqueue(session, name="slow", payload={"seconds": 10})
+        await session.commit()
+    await asyncio.sleep(0.1)
+    await runner.drain(timeout=0.2)
+    stuck = (await _jobs()).get(stuck_id)
+    checks.append((
+        "drain timeout releases job",
+        stuck is not None and stuck.status == JOB_PENDING and stuck.attempts == 0,
+    ))
+
+    await dispose_engines()
+    return checks
+
+
+def main() -> None:
+    directory = Path(tempfile.mkdtemp(prefix="pysavor-jobs-"))
+    # 設定は初回利用時に読み込まれるため、ここで環境変数を差し替えれば反映される
+    os.environ["DATABASE_URL"] = f"sqlite:///{directory / 'jobs.db'}"
+    migrate()
+
+    checks = asyncio.run(_run())
+    for name, passed in checks:
+        print(f"[{'ok' if passed else 'NG'}] {name}")
+    if not all(passed for _, passed in checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
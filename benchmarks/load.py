@@ -0,0 +1,135 @@
+"""httpxでASGIアプリに直接リクエストを送る、プロセス内の負荷ドライバー。
+
+    uv run python -m benchmarks.load --requests 2000 --concurrency 32 --output results/load.json
+
+エンドポイントごとにp50/p95/p99とスループットを計測する。
+DBが空であればbenchmarks.datagenで合成データを生成してから計測する。
+"""
+import argparse
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+from sqlalchemy import func, select
+
+from benchmarks.datagen import WORDS, Scale, ensure_dataset
+from benchmarks.report import summarize_latencies, write_results
+from src import security
+from src.db import get_async_engine, get_engine
+from src.main import app
+from src.models.user import User
+
+COOKIE_NAME = "pysavor_access_token"
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    method: str
+    path: str
+    params: dict[str, Any] | None = None
+    json: dict[str, Any] | None = None
+
+
+ENDPOINTS = {
+    "issues_me": Endpoint("issues_me", "GET", "/api/v1/issues/me"),
+    "issues_me_200": Endpoint("issues_me_200", "GET", "/api/v1/issues/me", params={"limit": 200}),
+    "issues_search": Endpoint(
+        "issues_search", "GET", "/api/v1/issues/search", params={"q": WORDS[0]}
+    ),
+    "issues_create": Endpoint(
+        "issues_create", "POST", "/api/v1/issues/", json={"title": "load test", "description": "x"}
+    ),
+}
+
+
+async def _drive(
+    transport: httpx.ASGITransport,
+    endpoint: Endpoint,
+    tokens: list[str],
+    requests: int,
+    concurrency: int,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    status_codes: dict[str, int] = {}
+    remaining = iter(range(requests))
+
+    async def worker(worker_id: int) -> None:
+        # ワーカーごとに別ユーザーとしてログインした状態でリクエストする
+        cookies = {COOKIE_NAME: tokens[worker_id % len(tokens)]}
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", cookies=cookies
+        ) as client:
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.request(
+                    endpoint.method, endpoint.path, params=endpoint.params, json=endpoint.json
+                )
+                latencies.append(time.perf_counter() - started)
+                key = str(response.status_code)
+                status_codes[key] = status_codes.get(key, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    summary = summarize_latencies(latencies, time.perf_counter() - started)
+    summary["status_codes"] = status_codes
+    return summary
+
+
+async def _run_all(
+    endpoints: list[Endpoint], tokens: list[str], requests: int, concurrency: int
+) -> dict[str, Any]:
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    for endpoint in endpoints:
+        results[endpoint.name] = await _drive(transport, endpoint, tokens, requests, concurrency)
+    await get_async_engine().dispose()
+    return results
+
+
+def _sample_tokens(sample_users: int, seed: int) -> list[str]:
+    with get_engine().connect() as connection:
+        max_user_id = connection.execute(select(func.max(User.id))).scalar_one()
+    rng = random.Random(seed)
+    return [
+        security.create_access_token(subject=rng.randint(1, max_user_id))
+        for _ in range(sample_users)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=1000, help="エンドポイントあたりのリクエスト数")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--sample-users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--endpoint",
+        action="append",
+        choices=sorted(ENDPOINTS),
+        help="計測するエンドポイント(複数指定可、省略時はすべて)",
+    )
+    parser.add_argument("--output", help="結果のJSONを書き出すパス(省略時は標準出力)")
+    args = parser.parse_args()
+
+    ensure_dataset(Scale(users=1000, issues=10000, collaborators=2, seed=args.seed))
+    endpoints = [ENDPOINTS[name] for name in args.endpoint or ENDPOINTS]
+    tokens = _sample_tokens(args.sample_users, args.seed)
+    results = asyncio.run(_run_all(endpoints, tokens, args.requests, args.concurrency))
+    write_results(
+        args.output,
+        "load",
+        results,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        sample_users=args.sample_users,
+        seed=args.seed,
+        endpoints=[endpoint.name for endpoint in endpoints],
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""MetricsMiddlewareが記録するrouteラベルを確認する。
+
+    uv run python -m benchmarks.metrics_labels
+
+別々の接頭辞でinclude_routerした2つのルーターに、同じ相対パス("/")のルートを置いて
+リクエストし、次を確認する。外れれば終了コード1で終わる。
+
+- 接頭辞を含めたテンプレートがラベルになり、2つのルーターのラベルが区別される
+- パスパラメータは実際の値ではなくテンプレートのまま記録される
+- どのルートにも一致しないリクエストは"unmatched"にまとめられる
+"""
+import asyncio
+import sys
+
+import httpx
+from fastapi import APIRouter, FastAPI
+
+from src import metrics
+from src.api.middleware import MetricsMiddleware
+
+
+def _create_app() -> FastAPI:
+    users, issues = APIRouter(), APIRouter()
+
+    @users.post("/")
+    async def create_user():
+        return {}
+
+    @issues.post("/")
+    async def create_issue():
+        return {}
+
+    @issues.get("/{issue_id}")
+    async def read_issue(issue_id: int):
+        return {}
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(users, prefix="/api/v1/users")
+    app.include_router(issues, prefix="/api/v1/issues")
+    return app
+
+
+def _recorded_routes() -> set[tuple[str, str]]:
+    return {
+        (sample.labels["method"], sample.labels["route"])
+        for family in metrics.registry.collect()
+        if family.name == "pysavor_http_requests"
+        for sample in family.samples
+        if sample.name == "pysavor_http_requests_total"
+    }
+
+
+async def _run() -> list[tuple[str, bool]]:
+    transport = httpx.ASGITransport(app=_create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://metrics-check") as client:
+        await client.post("/api/v1/users/")
+        await client.post("/api/v1/issues/")
+        await client.get("/api/v1/issues/42")
+        await client.get("/api/v1/issues/43")
+        await client.get("/no-such-route")
+
+    routes = _recorded_routes()
+    return [
+        (
+            "routers sharing a relative path get distinct labels",
+            {("POST", "/api/v1/users/"), ("POST", "/api/v1/issues/")} <= routes,
+        ),
+        ("path parameters stay templated", ("GET", "/api/v1/issues/{issue_id}") in routes),
+        ("unmatched requests share one label", ("GET", "unmatched") in routes),
+        ("no other labels", len(routes) == 4),
+    ]
+
+
+def main() -> None:
+    checks = asyncio.run(_run())
+    for name, passed in checks:
+        print(f"[{'ok' if passed else 'NG'}] {name}")
+    if not all(passed for _, passed in checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""get_current_user、resolve_scopeのクエリ、シリアライズのマイクロベンチマーク。
+
+    uv run python -m benchmarks.micro --iterations 500 --output results/micro.json
+
+DBが空であればbenchmarks.datagenで合成データを生成してから計測する。
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Awaitable, Callable
+
+import orjson
+from sqlalchemy import func
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from benchmarks.auth_dependency import CONDITIONS, measure_get_current_user
+from benchmarks.datagen import Scale, ensure_dataset
+from benchmarks.report import summarize_latencies, write_results
+from src import security
+from src.db import get_async_engine
+from src.models.user import User
+from src.policies.issue import IssuePolicy
+from src.repositories.issue import AsyncIssueRepository
+from src.schemas.issue import IssueRead
+
+PAGE_SIZE = 50
+SERIALIZE_PAGE_SIZE = 200
+
+
+def _scope(user_id: int):
+    return IssuePolicy(user=User(id=user_id, email="", hashed_password="")).resolve_scope()
+
+
+async def _measure(operation: Callable[[], Awaitable[None]], iterations: int) -> dict[str, float]:
+    await operation()
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        await operation()
+        latencies.append(time.perf_counter() - op_started)
+    return summarize_latencies(latencies, time.perf_counter() - started)
+
+
+async def _bench_get_current_user(user_id: int, iterations: int) -> dict[str, dict]:
+    token = security.create_access_token(subject=user_id)
+    results = {}
+    for label, condition in CONDITIONS.items():
+        seconds = await measure_get_current_user(token, iterations, **condition)
+        results[label] = {"us_per_op": seconds * 1e6}
+    return results
+
+
+async def _bench_resolve_scope(user_ids: list[int], iterations: int) -> dict[str, dict]:
+    issue_repository = AsyncIssueRepository()
+    scopes = [_scope(user_id) for user_id in user_ids]
+    rng = random.Random(0)
+
+    async def projection() -> None:
+        async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+            await issue_repository.find_read_page_by_scope(
+                session=session, scope=rng.choice(scopes), limit=PAGE_SIZE
+            )
+
+    return {"find_read_page_by_scope": await _measure(projection, iterations)}
+
+
+async def _bench_serialization(user_id: int, iterations: int) -> dict[str, dict]:
+    issue_repository = AsyncIssueRepository()
+    scope = _scope(user_id)
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        reads = await issue_repository.find_read_page_by_scope(
+            session=session, scope=scope, limit=SERIALIZE_PAGE_SIZE
+        )
+
+    # response_modelによる再検証+標準json(従来の経路)と、プロジェクション+orjsonの比較
+    async def validate_and_json() -> None:
+        json.dumps([IssueRead.model_validate(read.model_dump()).model_dump() for read in reads])
+
+    async def projection_orjson() -> None:
+        orjson.dumps([read.model_dump() for read in reads])
+
+    return {
+        "items": len(reads),
+        "model_validate+json": await _measure(validate_and_json, iterations),
+        "projection+orjson": await _measure(projection_orjson, iterations),
+    }
+
+
+async def _run_all(iterations: int, sample_users: int, seed: int) -> dict:
+    async with AsyncSession(get_async_engine()) as session:
+        max_user_id = (await session.exec(select(func.max(User.id)))).one()
+    rng = random.Random(seed)
+    user_ids = [rng.randint(1, max_user_id) for _ in range(sample_users)]
+
+    results = {
+        "get_current_user": await _bench_get_current_user(user_ids[0], iterations),
+        "resolve_scope": await _bench_resolve_scope(user_ids, iterations),
+        "serialization": await _bench_serialization(user_ids[0], iterations),
+    }
+    await get_async_engine().dispose()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--sample-users", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="結果のJSONを書き出すパス(省略時は標準出力)")
+    args = parser.parse_args()
+
+    ensure_dataset(Scale(users=1000, issues=10000, collaborators=2, seed=args.seed))
+    results = asyncio.run(_run_all(args.iterations, args.sample_users, args.seed))
+    write_results(
+        args.output,
+        "micro",
+        results,
+        iterations=args.iterations,
+        sample_users=args.sample_users,
+        seed=args.seed,
+    )
+
+
+if __name__ == "__main__":
+    main()
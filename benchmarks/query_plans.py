@@ -0,0 +1,210 @@
+"""リポジトリの各クエリのEXPLAIN QUERY PLANを取得し、フルスキャンを検出する。
+
+マイグレーションを適用した一時DBに対してリポジトリを実行し、発行されたSQLを記録する。
+いずれかのクエリがテーブルをSCANしていれば、非ゼロで終了する。
+
+あわせて GET /issues/me を1件のユーザーとN件のユーザーで呼び出し、発行されるSQLの数が
+件数によらず一定であること(N+1になっていないこと)を確かめる。
+
+    uv run python -m benchmarks.query_plans
+"""
+import asyncio
+import re
+import sys
+import time
+from typing import Any, Awaitable, Callable
+
+import httpx
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import security
+from src.db import count_queries, get_async_engine, get_engine
+from src.main import create_app
+from src.policies.issue import IssuePolicy
+from src.protocols.issue import IssueLoadPlan
+from src.repositories.issue import AsyncIssueRepository
+from src.repositories.job import AsyncJobRepository
+from src.repositories.user import AsyncUserRepository, get_principal_cache
+from src.schemas.issue import IssueCreate
+from src.schemas.user import UserCreate
+
+COOKIE_NAME = "pysavor_access_token"
+# 一覧のSQL数を比べる側のユーザーが持つIssueの件数
+MANY_ISSUES = 20
+
+FULL_SCAN = re.compile(r"\bSCAN (?!CONSTANT ROW)\w+")
+# FTS5はMATCH制約(idxStrの"M")を使う場合も"SCAN ... VIRTUAL TABLE"と表示される
+FTS_MATCH = re.compile(r"\bVIRTUAL TABLE INDEX \d+:\S*M")
+
+
+def _is_full_scan(line: str) -> bool:
+    return bool(FULL_SCAN.search(line)) and not FTS_MATCH.search(line)
+
+Query = Callable[[AsyncSession, dict[str, Any]], Awaitable[Any]]
+
+
+async def _seed(session: AsyncSession) -> dict[str, Any]:
+    users = AsyncUserRepository()
+    issues = AsyncIssueRepository()
+
+    owner = await users.create(
+        session, user_create=UserCreate(email="owner@example.com", password="x" * 8), hashed_password="x"
+    )
+    other = await users.create(
+        session, user_create=UserCreate(email="other@example.com", password="x" * 8), hashed_password="x"
+    )
+    issue = await issues.create(session, issue_create=IssueCreate(title="seed"), owner_id=owner.id)
+    await session.commit()
+    return {"owner": owner, "other": other, "issue": issue}
+
+
+async def _drain(iterator) -> list:
+    return [item async for item in iterator]
+
+
+def _queries() -> dict[str, Query]:
+    users = AsyncUserRepository()
+    issues = AsyncIssueRepository()
+    jobs = AsyncJobRepository()
+    plan = IssueLoadPlan(owner=True, collaborators=True)
+
+    def scope(ctx):
+        return IssuePolicy(user=ctx["owner"]).resolve_scope()
+
+    return {
+        "UserRepository.get_by_id": lambda s, ctx: users.get_by_id(s, id=ctx["owner"].id),
+        "UserRepository.get_by_ids": lambda s, ctx: users.get_by_ids(
+            s, ids=[ctx["owner"].id, ctx["other"].id]
+        ),
+        "UserRepository.get_principal": lambda s, ctx: users.get_principal(s, id=ctx["owner"].id),
+        "UserRepository.get_by_email": lambda s, ctx: users.get_by_email(s, email="owner@example.com"),
+        "IssueRepository.get_by_id": lambda s, ctx: issues.get_by_id(
+            s, id=ctx["issue"].id, load_plan=plan
+        ),
+        "IssueRepository.find_read_page_by_scope": lambda s, ctx: issues.find_read_page_by_scope(
+            s, scope=scope(ctx), limit=50, after_id=0
+        ),
+        "IssueRepository.iter_read_by_scope": lambda s, ctx: _drain(
+            issues.iter_read_by_scope(s, scope=scope(ctx), chunk_size=100)
+        ),
+        "IssueRepository.search_by_scope": lambda s, ctx: issues.search_by_scope(
+            s, scope=scope(ctx), query="seed", limit=50, load_plan=plan
+        ),
+        "IssueRepository.is_collaborator": lambda s, ctx: issues.is_collaborator(
+            s, issue_id=ctx["issue"].id, user_id=ctx["other"].id
+        ),
+        "IssueRepository.get_collection_version": lambda s, ctx: issues.get_collection_version(
+            s, user_id=ctx["owner"].id
+        ),
+        "IssueRepository.find_collaborator_ids": lambda s, ctx: issues.find_collaborator_ids(
+            s, issue_id=ctx["issue"].id, user_ids=[ctx["owner"].id, ctx["other"].id]
+        ),
+        "IssueRepository.find_changes": lambda s, ctx: issues.find_changes(
+            s, user_id=ctx["owner"].id, after_id=0, limit=100
+        ),
+        "IssueRepository.find_changes_after": lambda s, ctx: issues.find_changes_after(
+            s, after_id=0, limit=1000
+        ),
+        "IssueRepository.get_latest_change_id": lambda s, ctx: issues.get_latest_change_id(s),
+        "JobRepository.claim_due": lambda s, ctx: jobs.claim_due(
+            s, now=time.time(), lease_until=time.time() + 60, limit=4
+        ),
+    }
+
+
+def _explain(statement: str, parameters: Any) -> list[str]:
+    with get_engine().connect() as connection:
+        rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[3] for row in rows]
+
+
+async def _capture(ctx: dict[str, Any], query: Query) -> list[tuple[str, Any]]:
+    captured: list[tuple[str, Any]] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE")):
+            captured.append((statement, parameters))
+
+    get_principal_cache().clear()
+    event.listen(get_async_engine().sync_engine, "before_cursor_execute", _record)
+    try:
+        async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+            await query(session, ctx)
+    finally:
+        event.remove(get_async_engine().sync_engine, "before_cursor_execute", _record)
+    return captured
+
+
+async def _check_query_counts(ctx: dict[str, Any]) -> int:
+    users = AsyncUserRepository()
+    issues = AsyncIssueRepository()
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        many = await users.create(
+            session, user_create=UserCreate(email="many@example.com", password="x" * 8), hashed_password="x"
+        )
+        for i in range(MANY_ISSUES):
+            issue = await issues.create(
+                session, issue_create=IssueCreate(title=f"issue {i}"), owner_id=many.id
+            )
+            await issues.add_collaborator(session, issue=issue, user=ctx["other"])
+        await session.commit()
+
+    failures = 0
+    transport = httpx.ASGITransport(app=create_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://query-count") as client:
+        for params in ({"limit": 200}, {"stream": "true"}):
+            counters = []
+            for user in (ctx["owner"], many):
+                get_principal_cache().clear()
+                client.cookies.set(COOKIE_NAME, security.create_access_token(subject=user.id))
+                with count_queries() as counter:
+                    response = await client.get("/api/v1/issues/me", params=params)
+                    response.raise_for_status()
+                counters.append(counter)
+
+            single, multiple = counters
+            try:
+                multiple.assert_at_most(single.count)
+                status = "ok"
+            except AssertionError as e:
+                status = "N+1"
+                failures += 1
+                print(e)
+            print(
+                f"[{status}] GET /issues/me {params}: {single.count} queries for 1 issue, "
+                f"{multiple.count} for {MANY_ISSUES} issues"
+            )
+    return failures
+
+
+async def _run() -> int:
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        ctx = await _seed(session)
+
+    failures = 0
+    for name, query in _queries().items():
+        for statement, parameters in await _capture(ctx, query):
+            plan = _explain(statement, parameters)
+            scans = [line for line in plan if _is_full_scan(line)]
+            status = "FULL SCAN" if scans else "ok"
+            failures += bool(scans)
+            print(f"[{status}] {name}")
+            for line in plan:
+                print(f"    {line}")
+
+    failures += await _check_query_counts(ctx)
+
+    await get_async_engine().dispose()
+    return 1 if failures else 0
+
+
+def main() -> None:
+    command.upgrade(Config("alembic.ini"), "head")
+    sys.exit(asyncio.run(_run()))
+
+
+if __name__ == "__main__":
+    main()
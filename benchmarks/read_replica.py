@@ -0,0 +1,102 @@
+"""2つのSQLiteファイル(プライマリとそのコピー)で、読み書きのSession振り分けを確認する。
+
+    uv run python -m benchmarks.read_replica
+
+レプリカはプライマリをコピーした時点の内容のままなので、コピー後の書き込みは
+プライマリへ送られた読み取りにだけ見える。次を確認し、外れれば終了コード1で終わる。
+
+- 書き込み直後(read-your-writes Cookieあり)の読み取りはプライマリから返る
+- Cookieのない読み取りはレプリカから返る(コピー後の書き込みは見えない)
+- 書き込みリクエストのガードはレプリカの遅延に影響されない
+- /issues/me のレスポンスキャッシュにはプライマリから読んだ結果だけが保存される
+- 再度コピーすると、Cookieのない読み取りにも書き込みが見える
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import httpx
+
+from benchmarks.datagen import Scale, generate, migrate
+from src import security
+from src.api.middleware import READ_PRIMARY_UNTIL_COOKIE
+from src.db import dispose_engines
+from src.main import create_app
+
+COOKIE_NAME = "pysavor_access_token"
+
+
+def _replicate(primary: Path, replica: Path) -> None:
+    # WALを含めて一貫したコピーを取るため、ファイルコピーではなくバックアップAPIを使う
+    with sqlite3.connect(primary) as source, sqlite3.connect(replica) as target:
+        source.backup(target)
+
+
+async def _run(primary: Path, replica: Path) -> list[tuple[str, bool]]:
+    checks: list[tuple[str, bool]] = []
+    transport = httpx.ASGITransport(app=create_app())
+    cookies = {COOKIE_NAME: security.create_access_token(subject=1)}
+
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://replica-check", cookies=cookies
+    ) as client:
+
+        async def count_my_issues(limit: int = 200) -> int:
+            response = await client.get("/api/v1/issues/me", params={"limit": limit})
+            response.raise_for_status()
+            return len(response.json()["items"])
+
+        before = await count_my_issues()
+
+        created = await client.post("/api/v1/issues/", json={"title": "written after copy"})
+        created.raise_for_status()
+        sticky = READ_PRIMARY_UNTIL_COOKIE in client.cookies
+        checks.append(("write sets read-your-writes cookie", sticky))
+        checks.append(("sticky read sees own write", await count_my_issues() == before + 1))
+
+        client.cookies.delete(READ_PRIMARY_UNTIL_COOKIE)
+        # キャッシュされていないキーで読み、レプリカから返ることを確かめる
+        checks.append(("replica read lags behind primary", await count_my_issues(199) == before))
+        checks.append(
+            ("cache holds the primary read", await count_my_issues() == before + 1)
+        )
+
+        # レプリカに存在しないIssueへの書き込みでも、ガードはプライマリで判定される
+        shared = await client.post(f"/api/v1/issues/{created.json()['id']}/collaborators/2")
+        checks.append(("write guard reads primary", shared.status_code == 200))
+
+        client.cookies.delete(READ_PRIMARY_UNTIL_COOKIE)
+        _replicate(primary, replica)
+        # レプリカから読んだ結果がキャッシュされていれば、ここでも古い件数が返る
+        checks.append(
+            ("replica read catches up after copy", await count_my_issues(199) == before + 1)
+        )
+
+    await dispose_engines()
+    return checks
+
+
+def main() -> None:
+    directory = Path(tempfile.mkdtemp(prefix="pysavor-replica-"))
+    primary, replica = directory / "primary.db", directory / "replica.db"
+    os.environ["DATABASE_URL"] = f"sqlite:///{primary}"
+    # 設定は初回利用時に読み込まれるため、ここで環境変数を差し替えれば反映される
+    os.environ["READ_DATABASE_URL"] = f"sqlite:///{replica}"
+    os.environ["RESPONSE_CACHE_BACKEND"] = "memory"
+
+    migrate()
+    generate(Scale(users=3, issues=30, collaborators=0))
+    _replicate(primary, replica)
+
+    checks = asyncio.run(_run(primary, replica))
+    for name, passed in checks:
+        print(f"[{'ok' if passed else 'NG'}] {name}")
+    if not all(passed for _, passed in checks):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
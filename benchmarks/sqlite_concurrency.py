@@ -0,0 +1,96 @@
+"""ファイルSQLiteに対し、並行する書き込みと読み込みを実行してロック競合を検出する。
+
+    uv run python -m benchmarks.sqlite_concurrency --writers 8 --readers 8 --operations 200
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db import get_async_engine, get_engine
+from src.models.user import User
+from src.policies.issue import IssuePolicy
+from src.repositories.issue import AsyncIssueRepository
+from src.schemas.issue import IssueCreate
+
+
+def _setup() -> User:
+    SQLModel.metadata.create_all(get_engine())
+    with Session(get_engine()) as session:
+        user = User(email="concurrency@example.com", hashed_password="x")
+        session.add(user)
+        session.commit()
+        session.refresh(user)
+        session.expunge(user)
+        return user
+
+
+async def _writer(owner: User, operations: int, errors: list[Exception]) -> None:
+    repository = AsyncIssueRepository()
+    for index in range(operations):
+        try:
+            async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+                await repository.create(
+                    session=session,
+                    issue_create=IssueCreate(title=f"issue {index}"),
+                    owner_id=owner.id,
+                )
+                await session.commit()
+        except OperationalError as e:
+            errors.append(e)
+
+
+async def _reader(owner: User, operations: int, errors: list[Exception]) -> None:
+    repository = AsyncIssueRepository()
+    scope = IssuePolicy(user=owner).resolve_scope()
+    for _ in range(operations):
+        try:
+            async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+                await repository.find_read_page_by_scope(session=session, scope=scope, limit=50)
+        except OperationalError as e:
+            errors.append(e)
+
+
+async def _run(owner: User, writers: int, readers: int, operations: int) -> int:
+    errors: list[Exception] = []
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(_writer(owner, operations, errors) for _ in range(writers)),
+        *(_reader(owner, operations, errors) for _ in range(readers)),
+    )
+    elapsed = time.perf_counter() - started
+
+    async with AsyncSession(get_async_engine()) as session:
+        journal_mode = (await session.exec(text("PRAGMA journal_mode"))).scalar()
+        written = (await session.exec(text("SELECT count(*) FROM issues"))).scalar()
+    await get_async_engine().dispose()
+
+    print(f"journal_mode={journal_mode}")
+    print(f"issues written={written} expected={writers * operations}")
+    print(f"elapsed={elapsed:.2f}s errors={len(errors)}")
+    for error in errors[:5]:
+        print(f"  {error.orig!r}")
+
+    if errors or written != writers * operations:
+        return 1
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=200)
+    args = parser.parse_args()
+
+    owner = _setup()
+    sys.exit(asyncio.run(_run(owner, args.writers, args.readers, args.operations)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,82 @@
+import time
+from typing import AsyncIterator
+
 from fastapi import Depends, HTTPException, Path, status, Request
-from jose import jwt, JWTError
+from jose import JWTError
 from pydantic import ValidationError
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.db import current_session
+from src import change_feed, jobs, response_cache, security
+from src.api.middleware import READ_PRIMARY_UNTIL_COOKIE, SAFE_METHODS
+from src.db import current_async_session, get_async_read_engine, has_read_replica
 from src.models.user import User
 from src.models.issue import Issue
-from src.repositories.user import UserRepository
-from src.repositories.issue import IssueRepository
-from src.schemas.token import TokenPayload
-from src.settings import settings
+from src.protocols.issue import IssueLoadPlan
+from src.repositories.user import AsyncUserRepository
+from src.repositories.issue import AsyncCollaboratorMembership, AsyncIssueRepository
 from src.policies.issue import IssuePolicy
+from src.protocols.cache import ResponseCacheProtocol
+from src.protocols.change_feed import ChangeFeedProtocol
+from src.protocols.job import JobQueueProtocol
+
+# レスポンス(IssueRead)がownerを参照するため、あわせて読み込む
+GUARDED_ISSUE_LOAD_PLAN = IssueLoadPlan(owner=True)
+
+
+def get_password_hasher() -> security.PasswordHasher:
+    return security.get_password_hasher()
+
+
+def get_response_cache() -> ResponseCacheProtocol:
+    return response_cache.get_response_cache()
+
+
+def get_change_feed() -> ChangeFeedProtocol:
+    return change_feed.get_change_feed()
+
+
+def get_job_queue() -> JobQueueProtocol:
+    return jobs.get_job_runner()
 
 
 def get_token_from_cookie(request: Request) -> str | None:
     return request.cookies.get("pysavor_access_token")
 
 
-def get_current_user(
-    session: Session = Depends(current_session),
+def is_pinned_to_primary(request: Request) -> bool:
+    """書き込みリクエストか、直前に書き込んだクライアント(read-your-writes)であればTrue。"""
+    # 書き込みを伴うリクエストのガードは、遅延したレプリカではなくプライマリで判定する
+    if request.method not in SAFE_METHODS:
+        return True
+    try:
+        return float(request.cookies.get(READ_PRIMARY_UNTIL_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def reads_from_primary(pinned: bool = Depends(is_pinned_to_primary)) -> bool:
+    """current_read_sessionがプライマリのSessionを渡すかどうか。"""
+    return pinned or not has_read_replica()
+
+
+async def current_read_session(
+    from_primary: bool = Depends(reads_from_primary),
+    write_session: AsyncSession = Depends(current_async_session),
+) -> AsyncIterator[AsyncSession]:
+    """読み取り専用のルートと参照系のDIに、レプリカのSessionを渡す。
+
+    書き込みリクエストと、直前に書き込んだクライアント(read-your-writes)には
+    プライマリのSessionをそのまま渡す。SessionはSQLを発行するまで接続を取得しない。
+    """
+    if from_primary:
+        yield write_session
+        return
+    async with AsyncSession(get_async_read_engine(), expire_on_commit=False) as session:
+        yield session
+
+
+async def get_current_user(
+    session: AsyncSession = Depends(current_read_session),
     token: str | None = Depends(get_token_from_cookie),
 ) -> User:
     if token is None:
@@ -29,17 +87,14 @@ def get_current_user(
         )
     
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = security.decode_access_token(token)
     except (JWTError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
     
-    user_repository = UserRepository()
+    user_repository = AsyncUserRepository()
 
     if token_data.sub is None:
         raise HTTPException(
@@ -47,35 +102,43 @@ def get_current_user(
             detail="Invalid token payload",
         )
         
-    user = user_repository.get_by_id(session, id=token_data.sub)
+    user = await user_repository.get_principal(session, id=token_data.sub)
     
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     
     return user
 
-def get_issue_by_id_from_path(
+async def get_issue_by_id_from_path(
     issue_id: int = Path(..., gt=0),
-    session: Session = Depends(current_session),
+    session: AsyncSession = Depends(current_read_session),
 ) -> Issue:
-    issue_repo = IssueRepository()
-    issue = issue_repo.get_by_id(session=session, id=issue_id)
+    issue_repo = AsyncIssueRepository()
+    issue = await issue_repo.get_by_id(
+        session=session, id=issue_id, load_plan=GUARDED_ISSUE_LOAD_PLAN
+    )
     if not issue:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Issue not found")
     return issue
 
-def get_user_by_id_from_path(
+async def get_user_by_id_from_path(
     user_id: int = Path(..., gt=0, alias="user_id"),
-    session: Session = Depends(current_session),
+    session: AsyncSession = Depends(current_read_session),
 ) -> User:
     """パスパラメータからuser_idを取得し、Userオブジェクトを返すDI。"""
-    user_repo = UserRepository()
-    user = user_repo.get_by_id(session=session, id=user_id)
+    user_repo = AsyncUserRepository()
+    user = await user_repo.get_by_id(session=session, id=user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
 
-def can_create_issue(
+def get_collaborator_membership(
+    session: AsyncSession = Depends(current_read_session),
+) -> AsyncCollaboratorMembership:
+    """同一リクエスト内の複数のガードで共有され、判定結果を再利用する。"""
+    return AsyncCollaboratorMembership(session=session, issue_repository=AsyncIssueRepository())
+
+async def can_create_issue(
     current_user: User = Depends(get_current_user),
 ) -> None:
     policy = IssuePolicy(user=current_user)
@@ -85,19 +148,20 @@ def can_create_issue(
             detail="You do not have permission to create issues",
         )
 
-def can_update_issue(
+async def can_update_issue(
     issue: Issue = Depends(get_issue_by_id_from_path),
     current_user: User = Depends(get_current_user),
+    membership: AsyncCollaboratorMembership = Depends(get_collaborator_membership),
 ) -> Issue:
-    policy = IssuePolicy(user=current_user)
-    if not policy.can_update(issue):
+    policy = IssuePolicy(user=current_user, membership=membership)
+    if not await policy.can_update(issue):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to update this issue",
         )
     return issue
 
-def can_delete_issue(
+async def can_delete_issue(
     issue: Issue = Depends(get_issue_by_id_from_path),
     current_user: User = Depends(get_current_user),
 ) -> Issue:
@@ -109,15 +173,28 @@ def can_delete_issue(
         )
     return issue
 
-def can_add_collaborator_to_issue(
+async def can_add_collaborator_to_issue(
     issue: Issue = Depends(get_issue_by_id_from_path),
     user_to_add: User = Depends(get_user_by_id_from_path),
     current_user: User = Depends(get_current_user),
+    membership: AsyncCollaboratorMembership = Depends(get_collaborator_membership),
 ) -> Issue:
-    policy = IssuePolicy(user=current_user)
-    if not policy.can_add_collaborator(issue=issue, user_to_add=user_to_add):
+    policy = IssuePolicy(user=current_user, membership=membership)
+    if not await policy.can_add_collaborator(issue=issue, user_to_add=user_to_add):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You do not have permission to add this collaborator to this issue",
         )
     return issue
+
+async def can_manage_issue_collaborators(
+    issue: Issue = Depends(get_issue_by_id_from_path),
+    current_user: User = Depends(get_current_user),
+) -> Issue:
+    policy = IssuePolicy(user=current_user)
+    if not policy.can_manage_collaborators(issue):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to manage collaborators of this issue",
+        )
+    return issue
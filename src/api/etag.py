@@ -0,0 +1,18 @@
+import hashlib
+from typing import Any
+
+
+def make_etag(version: int, *parts: Any) -> str:
+    """バージョンとレスポンスを左右するパラメータから強いETagを作る。"""
+    digest = hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+    return f'"{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Matchは弱い比較で判定する(RFC 9110 13.1.2)
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (candidate.strip().removeprefix("W/") for candidate in if_none_match.split(","))
+    return etag in candidates
@@ -0,0 +1,31 @@
+"""コミット後に実行するジョブのハンドラ。main.pyでimportしてjobs.JOB_HANDLERSへ登録する。"""
+from typing import Any
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.api.routers.issue import warm_my_issues_page
+from src.db import get_async_engine
+from src.jobs import job_handler
+from src.repositories.issue import AsyncIssueRepository
+from src.repositories.user import AsyncUserRepository
+from src.response_cache import NullResponseCache, get_response_cache
+from src.use_cases.issue import WARM_MY_ISSUES_JOB
+
+
+@job_handler(WARM_MY_ISSUES_JOB)
+async def warm_my_issues(payload: dict[str, Any]) -> None:
+    """Issueの作成・共有で一覧が変わったユーザーの、/issues/me の先頭ページを作っておく。"""
+    response_cache = get_response_cache()
+    if isinstance(response_cache, NullResponseCache):
+        return
+    issue_repository = AsyncIssueRepository()
+    # キャッシュへはプライマリから読んだ結果だけを保存する
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        users = await AsyncUserRepository().get_by_ids(session, ids=payload["user_ids"])
+        for user in users:
+            await warm_my_issues_page(
+                session,
+                current_user=user,
+                issue_repository=issue_repository,
+                response_cache=response_cache,
+            )
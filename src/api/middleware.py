@@ -0,0 +1,87 @@
+import math
+import time
+from http.cookies import SimpleCookie
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src import metrics
+from src.db import has_read_replica
+from src.settings import get_settings
+
+# 書き込み後、この時刻(UNIX時間)までは読み取りもプライマリへ送る
+READ_PRIMARY_UNTIL_COOKIE = "pysavor_read_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class MetricsMiddleware:
+    """ルートごとのレイテンシ、ステータスコード、処理中リクエスト数、SQL発行数を記録する。"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats, token = metrics.start_request(scope)
+        metrics.HTTP_REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.HTTP_REQUESTS_IN_FLIGHT.dec()
+            metrics.record_request(
+                stats, status=status_code, seconds=time.perf_counter() - started
+            )
+            metrics.end_request(token)
+
+
+class ReadYourWritesMiddleware:
+    """成功した書き込みリクエストの応答に、読み取りをプライマリへ固定するCookieを付ける。
+
+    レプリカの遅延中でも、書き込んだクライアントには自分の書き込みが見える。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] in SAFE_METHODS
+            or not has_read_replica()
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                MutableHeaders(scope=message).append("set-cookie", _read_primary_cookie())
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+def _read_primary_cookie() -> str:
+    settings = get_settings()
+    window = settings.READ_YOUR_WRITES_SECONDS
+    cookie: SimpleCookie = SimpleCookie()
+    cookie[READ_PRIMARY_UNTIL_COOKIE] = f"{time.time() + window:.3f}"
+    morsel = cookie[READ_PRIMARY_UNTIL_COOKIE]
+    morsel["max-age"] = math.ceil(window)
+    morsel["path"] = "/"
+    morsel["httponly"] = True
+    morsel["samesite"] = "lax"
+    if settings.COOKIE_SECURE:
+        morsel["secure"] = True
+    return morsel.OutputString()
@@ -1,28 +1,32 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.api import deps
 from src.schemas import auth as auth_schema
+from src.security import PasswordHasher
 from src.use_cases import auth as auth_use_case
-from src.use_cases.exceptions import AuthenticationError
-from src.repositories.user import UserRepository
-from src.settings import settings
+from src.use_cases.exceptions import AuthenticationError, ServiceUnavailableError
+from src.repositories.user import AsyncUserRepository
+from src.settings import Settings, get_settings
 
 router = APIRouter()
 
 
 @router.post("/login", tags=["Authentication"])
-def login(
+async def login(
     login_data: auth_schema.LoginRequest,
     response: Response,
-    session: Session = Depends(deps.current_session),
+    session: AsyncSession = Depends(deps.current_async_session),
+    password_hasher: PasswordHasher = Depends(deps.get_password_hasher),
+    settings: Settings = Depends(get_settings),
 ):
-    user_repository = UserRepository()
+    user_repository = AsyncUserRepository()
 
     try:
-        access_token = auth_use_case.login(
+        access_token = await auth_use_case.login(
             session=session,
             user_repository=user_repository,
+            password_hasher=password_hasher,
             email=login_data.email,
             password=login_data.password,
         )
@@ -45,3 +49,10 @@ def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    except ServiceUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
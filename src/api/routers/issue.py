@@ -1,17 +1,159 @@
-from fastapi import APIRouter, Depends, status
-from sqlmodel import Session
+import zlib
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.api import deps
+from src.api.etag import etag_matches, make_etag
+from src.api.responses import ORJSONResponse
+from src.protocols.cache import CachedResponse, ResponseCacheProtocol
+from src.protocols.change_feed import ChangeFeedProtocol
+from src.protocols.job import JobQueueProtocol
 from src.models.user import User
 from src.models.issue import Issue
-from src.schemas.issue import IssueRead, IssueCreate
-from src.repositories.issue import IssueRepository
-from src.repositories.user import UserRepository
+from src.schemas.issue import (
+    CollaboratorBatchCreate,
+    CollaboratorBatchResult,
+    IssueBulkCreate,
+    IssueBulkCreateResult,
+    IssueChangePage,
+    IssueChangeRead,
+    IssueCreate,
+    IssuePage,
+    IssueRead,
+    IssueSearchPage,
+)
+from src.repositories.issue import AsyncCollaboratorMembership, AsyncIssueRepository
+from src.repositories.user import AsyncUserRepository
+from src.settings import Settings, get_settings
+from src.use_cases.exceptions import InvalidCursorError
 
 from src.use_cases import issue as issue_use_case
 
 router = APIRouter()
 
+STREAM_CHUNK_SIZE = 500
+EXPORT_CHUNK_SIZE = 1000
+# 行ごとではなく、この大きさまで溜めてから送る(gzipの圧縮単位も兼ねる)
+EXPORT_FLUSH_BYTES = 64 * 1024
+CHANGES_PAGE_SIZE = 100
+
+MY_ISSUES_PAGE_SIZE = 50
+
+# 共有キャッシュに載せず、クライアントには毎回ETagで再検証させる
+MY_ISSUES_CACHE_CONTROL = "private, no-cache"
+
+
+def _my_issues_cache_key(limit: int, cursor: str | None) -> str:
+    return f"GET /issues/me?limit={limit}&cursor={cursor or ''}"
+
+
+async def warm_my_issues_page(
+    session: AsyncSession,
+    *,
+    current_user: User,
+    issue_repository: AsyncIssueRepository,
+    response_cache: ResponseCacheProtocol,
+    limit: int = MY_ISSUES_PAGE_SIZE,
+) -> None:
+    """GET /issues/me の先頭ページを組み立て、キャッシュになければ保存する。
+
+    sessionはプライマリのものを渡すこと(レプリカの結果はキャッシュしない)。
+    """
+    cache_key = _my_issues_cache_key(limit, None)
+    lookup = await response_cache.get(principal_id=current_user.id, key=cache_key)
+    if lookup.response is not None:
+        return
+    version = await issue_use_case.get_my_issues_version(
+        session=session, current_user=current_user, issue_repository=issue_repository
+    )
+    issues, next_cursor = await issue_use_case.get_my_issues_page(
+        session=session, current_user=current_user, issue_repository=issue_repository, limit=limit
+    )
+    # ETagとボディは、read_my_issuesがcursorなし・stream=falseで返すものと同じにする
+    etag = make_etag(version, current_user.id, limit, None, False)
+    body = ORJSONResponse({"items": issues, "next_cursor": next_cursor}).body
+    await response_cache.set(
+        principal_id=current_user.id,
+        key=cache_key,
+        generation=lookup.generation,
+        response=CachedResponse(body=body, etag=etag),
+    )
+
+
+async def _stream_issues_as_json_array(issues: AsyncIterator[IssueRead]) -> AsyncIterator[str]:
+    yield "["
+    first = True
+    async for issue in issues:
+        if not first:
+            yield ","
+        first = False
+        yield issue.model_dump_json()
+    yield "]"
+
+
+def _accepts_gzip(accept_encoding: str | None) -> bool:
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() == "gzip":
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+async def _stream_issues_as_ndjson(
+    issues: AsyncIterator[IssueRead], *, compress: bool
+) -> AsyncIterator[bytes]:
+    # 各行はpydantic-coreで直接バイト列へシリアライズし、送信済みのデータは保持しない
+    serializer = IssueRead.__pydantic_serializer__
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS) if compress else None
+    buffer = bytearray()
+    async for issue in issues:
+        buffer += serializer.to_json(issue)
+        buffer += b"\n"
+        if len(buffer) >= EXPORT_FLUSH_BYTES:
+            chunk = compressor.compress(buffer) if compressor else bytes(buffer)
+            buffer.clear()
+            if chunk:
+                yield chunk
+    if compressor:
+        yield compressor.compress(buffer) + compressor.flush()
+    elif buffer:
+        yield bytes(buffer)
+
+
+async def _stream_issue_changes_as_sse(
+    session: AsyncSession,
+    *,
+    current_user: User,
+    change_feed: ChangeFeedProtocol,
+    since: int,
+    heartbeat: float,
+) -> AsyncIterator[str]:
+    issue_repository = AsyncIssueRepository()
+    async with change_feed.subscribe(user_id=current_user.id) as subscription:
+        while True:
+            changes = await issue_use_case.wait_for_issue_changes(
+                session=session,
+                current_user=current_user,
+                issue_repository=issue_repository,
+                subscription=subscription,
+                since=since,
+                limit=CHANGES_PAGE_SIZE,
+                timeout=heartbeat,
+            )
+            if not changes:
+                # 中継サーバーに切断されないよう、コメント行を送る
+                yield ": keep-alive\n\n"
+                continue
+            for change in changes:
+                data = IssueChangeRead.model_construct(
+                    id=change.id, issue_id=change.issue_id, kind=change.kind
+                ).model_dump_json()
+                yield f"id: {change.id}\nevent: {change.kind}\ndata: {data}\n\n"
+            since = changes[-1].id
+
 
 @router.post(
     "/",
@@ -20,44 +162,252 @@ router = APIRouter()
     tags=["Issues"],
     dependencies=[Depends(deps.can_create_issue)],
 )
-def create_issue(
+async def create_issue(
     *,
-    session: Session = Depends(deps.current_session),
+    session: AsyncSession = Depends(deps.current_async_session),
     current_user: User = Depends(deps.get_current_user),
+    response_cache: ResponseCacheProtocol = Depends(deps.get_response_cache),
+    job_queue: JobQueueProtocol = Depends(deps.get_job_queue),
     issue_in: IssueCreate,
 ):
-    issue_repository = IssueRepository()
-    return issue_use_case.create_issue(
-        session=session, current_user=current_user, issue_repository=issue_repository, issue_create=issue_in
+    issue_repository = AsyncIssueRepository()
+    return await issue_use_case.create_issue(
+        session=session,
+        current_user=current_user,
+        issue_repository=issue_repository,
+        response_cache=response_cache,
+        job_queue=job_queue,
+        issue_create=issue_in,
+    )
+
+@router.post(
+    "/bulk",
+    response_model=IssueBulkCreateResult,
+    status_code=status.HTTP_201_CREATED,
+    tags=["Issues"],
+    dependencies=[Depends(deps.can_create_issue)],
+)
+async def bulk_create_issues(
+    *,
+    session: AsyncSession = Depends(deps.current_async_session),
+    current_user: User = Depends(deps.get_current_user),
+    response_cache: ResponseCacheProtocol = Depends(deps.get_response_cache),
+    job_queue: JobQueueProtocol = Depends(deps.get_job_queue),
+    bulk_in: IssueBulkCreate,
+):
+    issue_repository = AsyncIssueRepository()
+    ids = await issue_use_case.bulk_create_issues(
+        session=session,
+        current_user=current_user,
+        issue_repository=issue_repository,
+        response_cache=response_cache,
+        job_queue=job_queue,
+        issue_creates=bulk_in.items,
     )
+    return {"ids": ids}
 
-@router.get("/me", response_model=list[IssueRead], tags=["Issues"])
-def read_my_issues(
-    session: Session = Depends(deps.current_session),
+@router.get("/me", response_model=IssuePage, tags=["Issues"])
+async def read_my_issues(
+    session: AsyncSession = Depends(deps.current_read_session),
     current_user: User = Depends(deps.get_current_user),
+    limit: int = Query(MY_ISSUES_PAGE_SIZE, ge=1, le=200),
+    cursor: str | None = None,
+    stream: bool = False,
+    if_none_match: str | None = Header(None),
+    response_cache: ResponseCacheProtocol = Depends(deps.get_response_cache),
+    pinned_to_primary: bool = Depends(deps.is_pinned_to_primary),
+    from_primary: bool = Depends(deps.reads_from_primary),
 ):
-    issue_repository = IssueRepository()
-    return issue_use_case.get_my_issues(
+    issue_repository = AsyncIssueRepository()
+
+    # ストリームは件数が大きくなり得るため、キャッシュの対象にしない
+    cache_key = None if stream else _my_issues_cache_key(limit, cursor)
+    if cache_key is not None:
+        lookup = await response_cache.get(principal_id=current_user.id, key=cache_key)
+        # 直前に書き込んだクライアントには、キャッシュを経由せずプライマリから読んで返す
+        if lookup.response is not None and not pinned_to_primary:
+            # ヒット時はSQLもシリアライズも行わず、保存済みのバイト列を返す
+            headers = {"ETag": lookup.response.etag, "Cache-Control": MY_ISSUES_CACHE_CONTROL}
+            if etag_matches(if_none_match, lookup.response.etag):
+                return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+            return Response(
+                content=lookup.response.body, media_type="application/json", headers=headers
+            )
+
+    # 一覧のクエリやシリアライズの前に、バージョンの参照だけで304を返す
+    version = await issue_use_case.get_my_issues_version(
         session=session, current_user=current_user, issue_repository=issue_repository
     )
+    etag = make_etag(version, current_user.id, limit, cursor, stream)
+    headers = {"ETag": etag, "Cache-Control": MY_ISSUES_CACHE_CONTROL}
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if stream:
+        issues = issue_use_case.iter_my_issues(
+            session=session,
+            current_user=current_user,
+            issue_repository=issue_repository,
+            chunk_size=STREAM_CHUNK_SIZE,
+        )
+        return StreamingResponse(
+            _stream_issues_as_json_array(issues), media_type="application/json", headers=headers
+        )
+
+    try:
+        issues, next_cursor = await issue_use_case.get_my_issues_page(
+            session=session,
+            current_user=current_user,
+            issue_repository=issue_repository,
+            limit=limit,
+            cursor=cursor,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    # プロジェクション済みのため、response_modelによる再検証を経ずに返す
+    response = ORJSONResponse({"items": issues, "next_cursor": next_cursor}, headers=headers)
+    # 遅延したレプリカの結果を新しい世代に保存しないよう、プライマリから読んだ場合だけ保存する
+    if from_primary:
+        await response_cache.set(
+            principal_id=current_user.id,
+            key=cache_key,
+            generation=lookup.generation,
+            response=CachedResponse(body=response.body, etag=etag),
+        )
+    return response
+
+@router.get("/me/export", tags=["Issues"])
+async def export_my_issues(
+    session: AsyncSession = Depends(deps.current_read_session),
+    current_user: User = Depends(deps.get_current_user),
+    accept_encoding: str | None = Header(None),
+):
+    """閲覧できるすべてのIssueをNDJSONで返す。件数によらずメモリ使用量は一定に保つ。"""
+    issues = issue_use_case.iter_my_issues(
+        session=session,
+        current_user=current_user,
+        issue_repository=AsyncIssueRepository(),
+        chunk_size=EXPORT_CHUNK_SIZE,
+    )
+    compress = _accepts_gzip(accept_encoding)
+    headers = {"Cache-Control": "no-store", "Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(
+        _stream_issues_as_ndjson(issues, compress=compress),
+        media_type="application/x-ndjson",
+        headers=headers,
+    )
+
+@router.get("/changes", response_model=IssueChangePage, tags=["Issues"])
+async def read_issue_changes(
+    session: AsyncSession = Depends(deps.current_async_session),
+    read_session: AsyncSession = Depends(deps.current_read_session),
+    current_user: User = Depends(deps.get_current_user),
+    change_feed: ChangeFeedProtocol = Depends(deps.get_change_feed),
+    settings: Settings = Depends(get_settings),
+    since: int = Query(0, ge=0),
+    timeout: float | None = Query(None, ge=0),
+    accept: str | None = Header(None),
+    last_event_id: int | None = Header(None),
+):
+    """sinceより後の変更を返す。
+
+    Accept: text/event-stream ならServer-Sent Eventsで配信し続け、それ以外は
+    変更が届くかtimeout秒(上限CHANGE_FEED_MAX_WAIT_SECONDS)経つまで待つロングポーリングで返す。
+    変更の取得はプライマリから行い、レプリカの遅延で通知を取りこぼさないようにする。
+    """
+    # 認証に使ったレプリカの接続は、待機の間保持しない
+    await read_session.close()
+
+    if accept and "text/event-stream" in accept:
+        return StreamingResponse(
+            _stream_issue_changes_as_sse(
+                session,
+                current_user=current_user,
+                change_feed=change_feed,
+                since=last_event_id if last_event_id is not None else since,
+                heartbeat=settings.CHANGE_FEED_HEARTBEAT_SECONDS,
+            ),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+        )
+
+    wait = settings.CHANGE_FEED_MAX_WAIT_SECONDS
+    async with change_feed.subscribe(user_id=current_user.id) as subscription:
+        changes = await issue_use_case.wait_for_issue_changes(
+            session=session,
+            current_user=current_user,
+            issue_repository=AsyncIssueRepository(),
+            subscription=subscription,
+            since=since,
+            limit=CHANGES_PAGE_SIZE,
+            timeout=wait if timeout is None else min(timeout, wait),
+        )
+    return {"items": changes, "next_since": changes[-1].id if changes else since}
+
+@router.get("/search", response_model=IssueSearchPage, tags=["Issues"])
+async def search_my_issues(
+    session: AsyncSession = Depends(deps.current_read_session),
+    current_user: User = Depends(deps.get_current_user),
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+):
+    issue_repository = AsyncIssueRepository()
+    issues, next_offset = await issue_use_case.search_my_issues(
+        session=session,
+        current_user=current_user,
+        issue_repository=issue_repository,
+        query=q,
+        limit=limit,
+        offset=offset,
+    )
+    return {"items": issues, "next_offset": next_offset}
+
+@router.post("/{issue_id}/collaborators", response_model=CollaboratorBatchResult, tags=["Issues"])
+async def add_collaborators(
+    *,
+    session: AsyncSession = Depends(deps.current_async_session),
+    current_user: User = Depends(deps.get_current_user),
+    issue: Issue = Depends(deps.can_manage_issue_collaborators),
+    membership: AsyncCollaboratorMembership = Depends(deps.get_collaborator_membership),
+    response_cache: ResponseCacheProtocol = Depends(deps.get_response_cache),
+    job_queue: JobQueueProtocol = Depends(deps.get_job_queue),
+    batch_in: CollaboratorBatchCreate,
+):
+    user_repository = AsyncUserRepository()
+    issue_repository = AsyncIssueRepository()
+
+    return await issue_use_case.add_collaborators(
+        session=session,
+        current_user=current_user,
+        issue_repository=issue_repository,
+        user_repository=user_repository,
+        membership=membership,
+        response_cache=response_cache,
+        job_queue=job_queue,
+        issue=issue,
+        user_ids=batch_in.user_ids,
+    )
 
 @router.post("/{issue_id}/collaborators/{user_id}", response_model=IssueRead, tags=["Issues"])
-def add_collaborator(
+async def add_collaborator(
     *,
-    session: Session = Depends(deps.current_session),
+    session: AsyncSession = Depends(deps.current_async_session),
     issue: Issue = Depends(deps.can_add_collaborator_to_issue),
-    user_id: int,
+    user_to_add: User = Depends(deps.get_user_by_id_from_path),
+    response_cache: ResponseCacheProtocol = Depends(deps.get_response_cache),
+    job_queue: JobQueueProtocol = Depends(deps.get_job_queue),
 ):
-    user_repository = UserRepository()
-    issue_repository = IssueRepository()
-    
-    user_to_add = user_repository.get_by_id(session=session, id=user_id)
-    if not user_to_add:
-        pass
+    issue_repository = AsyncIssueRepository()
 
-    return issue_use_case.add_collaborator(
+    return await issue_use_case.add_collaborator(
         session=session,
         issue_repository=issue_repository,
+        response_cache=response_cache,
+        job_queue=job_queue,
         issue=issue,
         user_to_add=user_to_add,
     )
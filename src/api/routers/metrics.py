@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Response
+
+from src import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+def read_metrics() -> Response:
+    content, media_type = metrics.render()
+    return Response(content=content, media_type=media_type)
@@ -1,10 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.db import current_session
+from src.api import deps
+from src.db import current_async_session
 from src.schemas.user import UserRead, UserCreate
-from src.use_cases.exceptions import UserAlreadyExistsError
-from src.repositories.user import UserRepository
+from src.security import PasswordHasher
+from src.use_cases.exceptions import ServiceUnavailableError, UserAlreadyExistsError
+from src.repositories.user import AsyncUserRepository
 
 import src.use_cases.user as user_use_case
 
@@ -17,16 +19,20 @@ router = APIRouter()
     status_code=status.HTTP_201_CREATED,
     tags=["Users"],
 )
-def create_user(
+async def create_user(
     *,
-    session: Session = Depends(current_session),
+    session: AsyncSession = Depends(current_async_session),
+    password_hasher: PasswordHasher = Depends(deps.get_password_hasher),
     user_create: UserCreate,
 ) -> UserRead:
     try:
-        user_repository = UserRepository()
+        user_repository = AsyncUserRepository()
 
-        created_user = user_use_case.create_user(
-            session=session, user_repository=user_repository, user_create=user_create
+        created_user = await user_use_case.create_user(
+            session=session,
+            user_repository=user_repository,
+            password_hasher=password_hasher,
+            user_create=user_create,
         )
         return created_user
 
@@ -35,3 +41,10 @@ def create_user(
             status_code=status.HTTP_409_CONFLICT,
             detail="A user with this email already exists.",
         )
+
+    except ServiceUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
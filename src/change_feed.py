@@ -0,0 +1,133 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from functools import lru_cache
+from typing import AsyncIterator, Iterable
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.db import get_async_engine
+from src.repositories.issue import AsyncIssueRepository
+from src.settings import get_settings
+
+logger = logging.getLogger("pysavor.change_feed")
+
+
+class ChangeSubscription:
+    def __init__(self) -> None:
+        self._event = asyncio.Event()
+
+    def notify(self) -> None:
+        self._event.set()
+
+    async def wait(self, *, timeout: float) -> bool:
+        # 待機を始める前に届いた通知も取りこぼさない
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except TimeoutError:
+            return False
+        self._event.clear()
+        return True
+
+
+class ChangeFeed:
+    """ワーカーごとに1つのタスクでissue_changesを追いかけ、待機中のクライアントを起こす。
+
+    クライアントはそれぞれDBをポーリングせず、自分宛ての変更が届いたときだけ再取得する。
+    待機中のクライアントがいない間はDBを参照しない。
+
+    PostgreSQLではidの採番順にコミットされるとは限らず、大きいidが先に見えることがある。
+    最後に見たidより前のrescan_window件も毎回読み直し、遅れてコミットされた変更の
+    通知を取りこぼさないようにする。書き込みが直列化されるSQLiteでは0でよい。
+    """
+
+    def __init__(self, *, poll_interval: float, batch_size: int, rescan_window: int = 0):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.rescan_window = rescan_window
+        self._subscriptions: dict[int, set[ChangeSubscription]] = {}
+        self._active = asyncio.Event()
+        self._last_id: int | None = None
+        # 読み直す範囲のうち、通知済みの変更のid
+        self._seen: set[int] = set()
+        self._task: asyncio.Task | None = None
+
+    @asynccontextmanager
+    async def subscribe(self, *, user_id: int) -> AsyncIterator[ChangeSubscription]:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        subscription = ChangeSubscription()
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        self._active.set()
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscriptions[user_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[user_id]
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+        self._active = asyncio.Event()
+        self._last_id = None
+        self._seen = set()
+
+    def _notify(self, user_ids: Iterable[int]) -> None:
+        for user_id in user_ids:
+            for subscription in self._subscriptions.get(user_id, ()):
+                subscription.notify()
+
+    async def _run(self) -> None:
+        repository = AsyncIssueRepository()
+        while True:
+            if not self._subscriptions:
+                # 再開時は最新の位置から追いかける(それまでの変更は各クライアントが自分で取得する)
+                self._last_id = None
+                self._seen = set()
+                self._active.clear()
+                await self._active.wait()
+
+            try:
+                async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+                    if self._last_id is None:
+                        self._last_id = await repository.get_latest_change_id(session)
+                        # 位置を取得する前に確定した変更を見逃さないよう、全員に再取得させる
+                        self._notify(list(self._subscriptions))
+                        continue
+                    limit = self.batch_size + self.rescan_window
+                    changes = await repository.find_changes_after(
+                        session,
+                        after_id=max(self._last_id - self.rescan_window, 0),
+                        limit=limit,
+                    )
+            except Exception:
+                logger.exception("failed to read issue changes")
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            new_changes = [change for change in changes if change.id not in self._seen]
+            if new_changes:
+                self._last_id = max(self._last_id, changes[-1].id)
+                floor = self._last_id - self.rescan_window
+                self._seen = {
+                    id for id in self._seen.union(change.id for change in new_changes) if id > floor
+                }
+                self._notify({change.user_id for change in new_changes})
+            if len(changes) < limit:
+                await asyncio.sleep(self.poll_interval)
+
+
+@lru_cache
+def get_change_feed() -> ChangeFeed:
+    settings = get_settings()
+    return ChangeFeed(
+        poll_interval=settings.CHANGE_FEED_POLL_INTERVAL_SECONDS,
+        batch_size=settings.CHANGE_FEED_BATCH_SIZE,
+        rescan_window=settings.CHANGE_FEED_RESCAN_WINDOW,
+    )
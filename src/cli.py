@@ -0,0 +1,141 @@
+"""運用向けのコマンド。
+
+    uv run python -m src.cli rebuild-issue-access
+    uv run python -m src.cli check-issue-access --limit 20
+    uv run python -m src.cli import-users users.csv --chunk-size 1000 --workers 8
+"""
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator
+
+from pydantic import ValidationError
+from sqlmodel import Session
+
+from src.db import get_engine
+from src.repositories.issue import IssueRepository
+from src.repositories.user import UserRepository
+from src.schemas.user import UserCreate
+from src.security import get_password_hash
+from src.use_cases import user as user_use_case
+
+
+def rebuild_issue_access(args: argparse.Namespace) -> int:
+    with Session(get_engine()) as session:
+        count = IssueRepository().rebuild_access(session)
+    print(f"rebuilt issue_access: {count} rows")
+    return 0
+
+
+def check_issue_access(args: argparse.Namespace) -> int:
+    with Session(get_engine()) as session:
+        drift = IssueRepository().find_access_drift(session, limit=args.limit)
+    for user_id, issue_id, role in drift.missing:
+        print(f"missing: user_id={user_id} issue_id={issue_id} role={role}")
+    for user_id, issue_id, role in drift.unexpected:
+        print(f"unexpected: user_id={user_id} issue_id={issue_id} role={role}")
+    if drift.missing or drift.unexpected:
+        print("issue_access is inconsistent; run rebuild-issue-access to repair it")
+        return 1
+    print("issue_access is consistent")
+    return 0
+
+
+def _read_user_creates(rows: csv.DictReader, invalid: list[int]) -> Iterator[UserCreate]:
+    for row in rows:
+        try:
+            yield UserCreate(
+                email=row["email"], password=row["password"], full_name=row.get("full_name") or None
+            )
+        except (KeyError, ValidationError) as e:
+            invalid.append(rows.line_num)
+            print(
+                f"line {rows.line_num}: skipped invalid row ({e.__class__.__name__})",
+                file=sys.stderr,
+            )
+
+
+def import_users(args: argparse.Namespace) -> int:
+    invalid: list[int] = []
+    created = already_exists = duplicates = conflicts = 0
+    started = time.perf_counter()
+
+    # bcryptはサーバーのPasswordHasherとは別のプールで、全コアを使って計算する
+    with (
+        open(args.path, newline="", encoding="utf-8") as file,
+        ProcessPoolExecutor(
+            max_workers=args.workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor,
+        Session(get_engine()) as session,
+    ):
+
+        def hash_passwords(passwords: Iterable[str]) -> list[str]:
+            return list(executor.map(get_password_hash, passwords, chunksize=8))
+
+        user_creates = _read_user_creates(csv.DictReader(file), invalid)
+        for chunk in itertools.batched(user_creates, args.chunk_size):
+            result = user_use_case.import_users(
+                session=session,
+                user_repository=UserRepository(),
+                hash_passwords=hash_passwords,
+                user_creates=chunk,
+            )
+            created += result.created
+            already_exists += result.already_exists
+            duplicates += result.duplicates
+            conflicts += result.conflicts
+
+            processed = created + already_exists + duplicates + conflicts + len(invalid)
+            elapsed = time.perf_counter() - started
+            print(
+                f"{processed} rows: created {created}, existing {already_exists}, "
+                f"duplicate {duplicates}, conflict {conflicts}, invalid {len(invalid)} "
+                f"({processed / elapsed:.0f} rows/s, {created / elapsed:.0f} users/s)",
+                file=sys.stderr,
+            )
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"imported {created} users in {elapsed:.1f}s "
+        f"(existing {already_exists}, duplicate {duplicates}, conflict {conflicts}, "
+        f"invalid {len(invalid)})"
+    )
+    return 1 if invalid else 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m src.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser(
+        "rebuild-issue-access", help="issue_accessをissuesとcollaboratorsから作り直す"
+    )
+    rebuild.set_defaults(handler=rebuild_issue_access)
+
+    check = commands.add_parser(
+        "check-issue-access", help="issue_accessと導出元とのずれを検出する"
+    )
+    check.add_argument("--limit", type=int, default=100, help="表示するずれの最大件数")
+    check.set_defaults(handler=check_issue_access)
+
+    import_parser = commands.add_parser(
+        "import-users", help="CSV(email,password,full_name)からユーザーを一括作成する"
+    )
+    import_parser.add_argument("path", help="ヘッダー行を持つCSVファイル")
+    import_parser.add_argument("--chunk-size", type=int, default=1000)
+    import_parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="bcryptを計算するプロセス数"
+    )
+    import_parser.set_defaults(handler=import_users)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
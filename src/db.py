@@ -1,11 +1,214 @@
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import metrics, slow_query
+from src.settings import get_settings
+
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """同期ドライバのDATABASE_URLを、対応する非同期ドライバのURLへ変換する。"""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url.removeprefix("postgres://")
+    parsed = make_url(url)
+    drivername = _ASYNC_DRIVERS.get(parsed.drivername, parsed.drivername)
+    return parsed.set(drivername=drivername).render_as_string(hide_password=False)
+
+
+def _is_sqlite_memory(url: URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(url: str) -> dict[str, Any]:
+    """URLに応じたcreate_engine/create_async_engineの引数を返す。"""
+    settings = get_settings()
+    parsed = make_url(url)
+    options: dict[str, Any] = {}
+
+    if parsed.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+
+    # インメモリSQLiteは接続ごとに別DBとなるため、専用のプール設定を変更しない
+    if not _is_sqlite_memory(parsed):
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        )
+
+    return options
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    settings = get_settings()
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+        cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}")
+        cursor.execute(f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}")
+    finally:
+        cursor.close()
+
+
+class _CheckoutTimingMixin:
+    """プールから接続を取り出すまでの待ち時間を計測する。"""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started_at"].pop()
+    elapsed = time.perf_counter() - started
+    metrics.record_query(elapsed)
+    settings = get_settings()
+    if settings.SLOW_QUERY_LOG_ENABLED and elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        slow_query.log_slow_query(conn, statement, parameters, seconds=elapsed)
+
 
-from src.settings import settings
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        started = connection.info["query_started_at"].pop()
+        metrics.record_query(time.perf_counter() - started)
 
-engine = create_engine(str(settings.DATABASE_URL), connect_args={"check_same_thread": False})
+
+def instrument_engine(target: Engine) -> None:
+    event.listen(target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(target, "after_cursor_execute", _after_cursor_execute)
+    event.listen(target, "handle_error", _handle_error)
+    if target.dialect.name == "sqlite":
+        event.listen(target, "connect", apply_sqlite_pragmas)
+
+
+def build_engine(url: str) -> Engine:
+    options = engine_options(url)
+    if "pool_size" in options:
+        options["poolclass"] = TimedQueuePool
+    new_engine = create_engine(url, **options)
+    instrument_engine(new_engine)
+    return new_engine
+
+
+def build_async_engine(url: str) -> AsyncEngine:
+    options = engine_options(url)
+    if "pool_size" in options:
+        options["poolclass"] = TimedAsyncAdaptedQueuePool
+    new_engine = create_async_engine(url, **options)
+    instrument_engine(new_engine.sync_engine)
+    return new_engine
+
+
+# エンジンは初回利用時に生成する。インポートだけでは設定の読み込みや接続プールの構築を行わない
+@lru_cache
+def get_engine() -> Engine:
+    return build_engine(str(get_settings().DATABASE_URL))
+
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    settings = get_settings()
+    return build_async_engine(
+        settings.ASYNC_DATABASE_URL or to_async_url(str(settings.DATABASE_URL))
+    )
+
+
+@lru_cache
+def get_async_read_engine() -> AsyncEngine:
+    """読み取り用(レプリカ)のエンジン。READ_DATABASE_URLが未設定なら書き込み用と共有する。"""
+    settings = get_settings()
+    if not settings.READ_DATABASE_URL:
+        return get_async_engine()
+    return build_async_engine(to_async_url(settings.READ_DATABASE_URL))
+
+
+def has_read_replica() -> bool:
+    return get_async_read_engine() is not get_async_engine()
+
+
+async def dispose_engines() -> None:
+    # 生成済みのエンジンのみ破棄する
+    if get_async_read_engine.cache_info().currsize and has_read_replica():
+        await get_async_read_engine().dispose()
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+    if get_engine.cache_info().currsize:
+        get_engine().dispose()
 
 
 def current_session():
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
+        yield session
+
+
+async def current_async_session() -> AsyncIterator[AsyncSession]:
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
         yield session
 
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.statements: list[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def assert_at_most(self, expected: int) -> None:
+        if self.count > expected:
+            executed = "\n".join(self.statements)
+            raise AssertionError(
+                f"Expected at most {expected} queries, but {self.count} were executed:\n{executed}"
+            )
+
+
+@contextmanager
+def count_queries(target: Engine | None = None) -> Iterator[QueryCounter]:
+    """ブロック内で発行されたSQL文を記録する。N+1の回帰検知に用いる。"""
+    if target is None:
+        target = get_async_engine().sync_engine
+    counter = QueryCounter()
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        counter.statements.append(statement)
+
+    event.listen(target, "before_cursor_execute", _record)
+    try:
+        yield counter
+    finally:
+        event.remove(target, "before_cursor_execute", _record)
@@ -0,0 +1,218 @@
+import asyncio
+import logging
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Mapping, Sequence
+
+from sqlalchemy import event
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import metrics
+from src.db import get_async_engine
+from src.models.job import Job
+from src.repositories.job import AsyncJobRepository
+from src.settings import get_settings
+
+logger = logging.getLogger("pysavor.jobs")
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+# ジョブ名 -> ハンドラ。job_handlerで登録する
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+
+def job_handler(name: str) -> Callable[[JobHandler], JobHandler]:
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[name] = handler
+        return handler
+
+    return register
+
+
+class JobRunner:
+    """jobsテーブルのジョブを、イベントループ上のワーカープールで実行する。
+
+    ジョブの取得は1つのディスパッチャーが空いているワーカーの数だけまとめて行い、
+    ワーカーごとにDBをポーリングしない。失敗したジョブは指数バックオフで再試行する。
+    """
+
+    def __init__(
+        self,
+        *,
+        handlers: Mapping[str, JobHandler],
+        workers: int,
+        poll_interval: float,
+        max_attempts: int,
+        retry_base: float,
+        retry_max: float,
+        lease: float,
+    ):
+        self.handlers = handlers
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.lease = lease
+        self.repository = AsyncJobRepository()
+        self._queue: asyncio.Queue[Job] = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._busy = 0
+        self._stopping = False
+        self._dispatcher: asyncio.Task | None = None
+        self._tasks: list[asyncio.Task] = []
+
+    async def enqueue(
+        self,
+        session: AsyncSession,
+        *,
+        name: str,
+        payload: Mapping[str, Any],
+        delay: float = 0.0,
+    ) -> int:
+        job = await self.repository.create(
+            session,
+            name=name,
+            payload=dict(payload),
+            run_at=time.time() + delay,
+            max_attempts=self.max_attempts,
+        )
+        # 同じプロセスで登録されたジョブは、コミットされたらポーリングを待たずに取得する
+        event.listen(session.sync_session, "after_commit", self._wake, once=True)
+        return job.id
+
+    def _wake(self, session: Any) -> None:
+        self._wakeup.set()
+
+    def start(self) -> None:
+        if self._dispatcher is not None:
+            return
+        self._stopping = False
+        self._queue = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def drain(self, *, timeout: float) -> None:
+        """新しいジョブの取得をやめ、取得済みのジョブの完了をtimeout秒まで待つ。
+
+        期限までに終わらなかったジョブは中断し、次回の起動ですぐ実行されるようpendingに戻す。
+        """
+        if self._dispatcher is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._dispatcher
+        self._dispatcher = None
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except TimeoutError:
+            logger.warning("job runner drain timed out; releasing unfinished jobs")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        leftover = []
+        while not self._queue.empty():
+            leftover.append(self._queue.get_nowait())
+        await self._release(leftover)
+
+    def _backoff(self, attempts: int) -> float:
+        return min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+
+    async def _dispatch(self) -> None:
+        while not self._stopping:
+            self._wakeup.clear()
+            free = self.workers - self._busy
+            if free > 0:
+                try:
+                    jobs = await self._claim(limit=free)
+                except Exception:
+                    logger.exception("failed to claim jobs")
+                    jobs = []
+                for job in jobs:
+                    self._busy += 1
+                    self._queue.put_nowait(job)
+            # ワーカーが空くか、同じプロセスでジョブが登録されると起こされる
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except TimeoutError:
+                pass
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._execute(job)
+            finally:
+                self._busy -= 1
+                self._queue.task_done()
+                self._wakeup.set()
+
+    async def _execute(self, job: Job) -> None:
+        handler = self.handlers.get(job.name)
+        if handler is None:
+            await self._finish(job, "failed", f"no handler registered for job {job.name!r}")
+            return
+
+        started = time.perf_counter()
+        try:
+            await handler(job.payload)
+        except asyncio.CancelledError:
+            await self._release([job])
+            raise
+        except Exception as e:
+            error = f"{e.__class__.__name__}: {e}"
+            outcome = "failed" if job.attempts >= job.max_attempts else "retried"
+            logger.warning("job %s (%s) %s: %s", job.id, job.name, outcome, error)
+            await self._finish(job, outcome, error)
+        else:
+            await self._finish(job, "succeeded")
+        finally:
+            metrics.JOB_SECONDS.labels(name=job.name).observe(time.perf_counter() - started)
+
+    async def _claim(self, *, limit: int) -> Sequence[Job]:
+        now = time.time()
+        async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+            return await self.repository.claim_due(
+                session, now=now, lease_until=now + self.lease, limit=limit
+            )
+
+    async def _finish(self, job: Job, outcome: str, error: str | None = None) -> None:
+        metrics.JOBS_PROCESSED.labels(name=job.name, outcome=outcome).inc()
+        async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+            if outcome == "succeeded":
+                await self.repository.complete(session, id=job.id)
+            elif outcome == "retried":
+                await self.repository.retry(
+                    session,
+                    id=job.id,
+                    run_at=time.time() + self._backoff(job.attempts),
+                    error=error,
+                )
+            else:
+                await self.repository.fail(session, id=job.id, error=error)
+
+    async def _release(self, jobs: Sequence[Job]) -> None:
+        if not jobs:
+            return
+        async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+            await self.repository.release(
+                session, ids=[job.id for job in jobs], run_at=time.time()
+            )
+
+
+@lru_cache
+def get_job_runner() -> JobRunner:
+    settings = get_settings()
+    return JobRunner(
+        handlers=JOB_HANDLERS,
+        workers=settings.JOB_WORKERS,
+        poll_interval=settings.JOB_POLL_INTERVAL_SECONDS,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        retry_base=settings.JOB_RETRY_BASE_SECONDS,
+        retry_max=settings.JOB_RETRY_MAX_SECONDS,
+        lease=settings.JOB_LEASE_SECONDS,
+    )
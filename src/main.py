@@ -1,17 +1,51 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
 from src.api.routers import user
 from src.api.routers import auth
 from src.api.routers import issue
+from src.api.routers import metrics
+from src.api import job_handlers  # noqa: F401  ジョブのハンドラを登録する
+from src.api.middleware import MetricsMiddleware, ReadYourWritesMiddleware
+from src.api.responses import ORJSONResponse
+from src.change_feed import get_change_feed
+from src.db import dispose_engines
+from src.jobs import get_job_runner
+from src.security import get_password_hasher
+from src.settings import get_settings
 
-app = FastAPI(title="pysavor")
 
-app.include_router(user.router, prefix="/api/v1/users")
-app.include_router(auth.router, prefix="/api/v1/auth")
-app.include_router(issue.router, prefix="/api/v1/issues")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 設定の誤りは最初のリクエストではなく起動時に検出する
+    settings = get_settings()
+    if settings.JOB_RUNNER_ENABLED:
+        get_job_runner().start()
+    yield
+    await get_job_runner().drain(timeout=settings.JOB_DRAIN_TIMEOUT_SECONDS)
+    await get_change_feed().stop()
+    get_password_hasher().shutdown()
+    await dispose_engines()
 
 
-@app.get("/")
 def read_root():
     return {"message": "The architect is in the building."}
 
+
+def create_app() -> FastAPI:
+    """アプリケーションを組み立てる。設定の読み込みとエンジンの生成は初回利用時まで遅延する。"""
+    app = FastAPI(title="pysavor", lifespan=lifespan, default_response_class=ORJSONResponse)
+    app.add_middleware(ReadYourWritesMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    app.include_router(user.router, prefix="/api/v1/users")
+    app.include_router(auth.router, prefix="/api/v1/auth")
+    app.include_router(issue.router, prefix="/api/v1/issues")
+    app.include_router(metrics.router)
+    app.get("/")(read_root)
+
+    return app
+
+
+app = create_app()
@@ -0,0 +1,205 @@
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Mapping
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from src.cache import TTLCache
+
+registry = CollectorRegistry()
+
+HTTP_REQUESTS = Counter(
+    "pysavor_http_requests_total",
+    "HTTP requests by route and status code.",
+    ["method", "route", "status"],
+    registry=registry,
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "pysavor_http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ["method", "route"],
+    registry=registry,
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "pysavor_http_requests_in_flight",
+    "HTTP requests currently being served.",
+    registry=registry,
+)
+
+DB_QUERIES = Counter(
+    "pysavor_db_queries_total",
+    "SQL statements executed.",
+    registry=registry,
+)
+DB_QUERY_SECONDS = Histogram(
+    "pysavor_db_query_duration_seconds",
+    "SQL statement execution time.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+    registry=registry,
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "pysavor_db_queries_per_request",
+    "SQL statements executed per HTTP request.",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+    registry=registry,
+)
+DB_SECONDS_PER_REQUEST = Histogram(
+    "pysavor_db_duration_per_request_seconds",
+    "Total SQL execution time per HTTP request.",
+    ["route"],
+    registry=registry,
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "pysavor_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+    registry=registry,
+)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    "pysavor_password_hash_duration_seconds",
+    "bcrypt computation time inside the worker process.",
+    ["operation"],
+    registry=registry,
+)
+PASSWORD_HASH_QUEUE_SECONDS = Histogram(
+    "pysavor_password_hash_queue_seconds",
+    "Time a bcrypt call waited for a worker process.",
+    ["operation"],
+    registry=registry,
+)
+
+JOBS_PROCESSED = Counter(
+    "pysavor_jobs_processed_total",
+    "Background job executions by outcome (succeeded, retried, failed).",
+    ["name", "outcome"],
+    registry=registry,
+)
+JOB_SECONDS = Histogram(
+    "pysavor_job_duration_seconds",
+    "Background job handler execution time.",
+    ["name"],
+    registry=registry,
+)
+
+
+# キャッシュ名 -> プロセス内のTTLCache。生成されたキャッシュだけがregister_cacheで登録される
+_caches: dict[str, TTLCache] = {}
+
+
+class _CacheCollector:
+    """TTLCacheが内部で数えているヒット数・ミス数と件数を、収集時に読み出す。"""
+
+    def collect(self):
+        hits = CounterMetricFamily(
+            "pysavor_cache_hits", "In-process cache lookups that found a live entry.", labels=["cache"]
+        )
+        misses = CounterMetricFamily(
+            "pysavor_cache_misses",
+            "In-process cache lookups that found no entry or an expired one.",
+            labels=["cache"],
+        )
+        entries = GaugeMetricFamily(
+            "pysavor_cache_entries", "Entries currently held by in-process caches.", labels=["cache"]
+        )
+        for name, cache in list(_caches.items()):
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            entries.add_metric([name], stats["size"])
+        yield hits
+        yield misses
+        yield entries
+
+
+registry.register(_CacheCollector())
+
+
+def register_cache(name: str, cache: TTLCache) -> None:
+    _caches[name] = cache
+
+
+@dataclass
+class RequestStats:
+    # ルーティングで書き換えられるASGIのscopeを保持し、ルートは参照時に解決する
+    scope: Mapping[str, Any] = field(repr=False)
+    queries: int = 0
+    query_seconds: float = 0.0
+
+    @property
+    def method(self) -> str:
+        return self.scope.get("method", "")
+
+    @property
+    def route(self) -> str:
+        # パスパラメータを含む実パスではなくルートのテンプレートを使い、ラベルの種類を抑える
+        route = self.scope.get("route")
+        template = getattr(route, "path", None)
+        if not template:
+            return "unmatched"
+        return _route_prefix(self.scope, route) + template
+
+
+def _route_prefix(scope: Mapping[str, Any], route: Any) -> str:
+    """include_routerの接頭辞やマウント先など、ルートのテンプレートより前の部分を返す。
+
+    ルートのpathはルーター内の相対パスの場合があり、そのままでは別のルーターの
+    同じパス(例: 各ルーターの"/")と区別できない。実パスのうちルートに一致する
+    末尾を除いた部分を接頭辞とする。
+    """
+    path = scope.get("path", "")
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is None:
+        return ""
+    for index, char in enumerate(path):
+        if char == "/" and path_regex.match(path[index:]):
+            return path[:index]
+    return ""
+
+
+_request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def start_request(scope: Mapping[str, Any]) -> tuple[RequestStats, Token]:
+    stats = RequestStats(scope=scope)
+    return stats, _request_stats.set(stats)
+
+
+def current_request() -> RequestStats | None:
+    return _request_stats.get()
+
+
+def end_request(token: Token) -> None:
+    _request_stats.reset(token)
+
+
+def record_query(seconds: float) -> None:
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.observe(seconds)
+    # リクエスト外(マイグレーションやスクリプト)で発行されたSQLはリクエスト単位に集計しない
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += seconds
+
+
+def record_request(stats: RequestStats, *, status: int, seconds: float) -> None:
+    method, route = stats.method, stats.route
+    HTTP_REQUESTS.labels(method=method, route=route, status=str(status)).inc()
+    HTTP_REQUEST_SECONDS.labels(method=method, route=route).observe(seconds)
+    DB_QUERIES_PER_REQUEST.labels(route=route).observe(stats.queries)
+    DB_SECONDS_PER_REQUEST.labels(route=route).observe(stats.query_seconds)
+
+
+def render() -> tuple[bytes, str]:
+    """Prometheusのテキスト形式で、本文とContent-Typeを返す。"""
+    return generate_latest(registry), CONTENT_TYPE_LATEST
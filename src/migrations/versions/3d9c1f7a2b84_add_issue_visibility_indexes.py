@@ -0,0 +1,31 @@
+"""Add issue visibility indexes
+
+Revision ID: 3d9c1f7a2b84
+Revises: 875428da6c8e
+Create Date: 2026-10-17 10:12:41.218530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d9c1f7a2b84'
+down_revision: Union[str, Sequence[str], None] = '875428da6c8e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_issues_owner_id'), 'issues', ['owner_id'], unique=False)
+    op.create_index('ix_collaborators_user_id_issue_id', 'collaborators', ['user_id', 'issue_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_collaborators_user_id_issue_id', table_name='collaborators')
+    op.drop_index(op.f('ix_issues_owner_id'), table_name='issues')
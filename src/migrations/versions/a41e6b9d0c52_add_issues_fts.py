@@ -0,0 +1,74 @@
+"""Add issues full-text search index
+
+Revision ID: a41e6b9d0c52
+Revises: 3d9c1f7a2b84
+Create Date: 2026-10-17 14:03:27.502311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41e6b9d0c52'
+down_revision: Union[str, Sequence[str], None] = '3d9c1f7a2b84'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FTS5はSQLite専用。他の方言では、検索はリポジトリ側の部分一致で行う
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE issues_fts USING fts5(
+            title,
+            description,
+            content='issues',
+            content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER issues_fts_ai AFTER INSERT ON issues BEGIN
+            INSERT INTO issues_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER issues_fts_ad AFTER DELETE ON issues BEGIN
+            INSERT INTO issues_fts(issues_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER issues_fts_au AFTER UPDATE OF title, description ON issues BEGIN
+            INSERT INTO issues_fts(issues_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO issues_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """
+    )
+    op.execute("INSERT INTO issues_fts(issues_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS issues_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS issues_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS issues_fts_ai")
+    op.execute("DROP TABLE IF EXISTS issues_fts")
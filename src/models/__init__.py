@@ -1,16 +1,19 @@
-import pkgutil
-import inspect
-import importlib
+# テーブルを持つモデルの明示的な登録簿。
+# SQLModel.metadata(Alembicのautogenerateを含む)に載せるモデルは、ここに追加する。
+from .collaborator import Collaborator
+from .issue import Issue
+from .issue_access import IssueAccess
+from .issue_change import IssueChange
+from .issue_collection_version import IssueCollectionVersion
+from .job import Job
+from .user import User
 
-__path__ = pkgutil.extend_path(__path__, __name__)
-
-for importer, modname, ispkg in pkgutil.iter_modules(path=__path__, prefix=__name__ + "."):
-    module = importlib.import_module(modname)
-
-    for name, obj in inspect.getmembers(module):
-        if (
-            inspect.isclass(obj)
-            and hasattr(obj, "__table__")
-            and obj.__module__ == module.__name__
-        ):
-            globals()[name] = obj
+__all__ = [
+    "Collaborator",
+    "Issue",
+    "IssueAccess",
+    "IssueChange",
+    "IssueCollectionVersion",
+    "Job",
+    "User",
+]
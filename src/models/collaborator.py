@@ -1,10 +1,14 @@
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class Collaborator(SQLModel, table=True):
     __tablename__ = "collaborators"
+    __table_args__ = (
+        Index("ix_collaborators_user_id_issue_id", "user_id", "issue_id"),
+    )
 
     issue_id: Optional[int] = Field(
         default=None, foreign_key="issues.id", primary_key=True
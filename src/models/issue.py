@@ -13,7 +13,7 @@ class Issue(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     title: str = Field(index=True)
     description: Optional[str] = None
-    owner_id: int = Field(foreign_key="users.id")
+    owner_id: int = Field(foreign_key="users.id", index=True)
 
     owner: "User" = Relationship(back_populates="issues")
 
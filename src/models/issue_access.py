@@ -0,0 +1,25 @@
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+OWNER_ROLE = "owner"
+COLLABORATOR_ROLE = "collaborator"
+
+
+class IssueAccess(SQLModel, table=True):
+    """ユーザーごとに閲覧できるIssueを展開したテーブル。
+
+    issues.owner_idとcollaboratorsから導出され、作成・共有と同じトランザクションで更新する。
+    主キー(user_id, issue_id)により、一覧は範囲検索、権限判定は点検索で引ける。
+    """
+
+    __tablename__ = "issue_access"
+    __table_args__ = {"sqlite_with_rowid": False}
+
+    user_id: Optional[int] = Field(
+        default=None, foreign_key="users.id", primary_key=True
+    )
+    issue_id: Optional[int] = Field(
+        default=None, foreign_key="issues.id", primary_key=True
+    )
+    role: str
@@ -0,0 +1,26 @@
+from typing import Optional
+
+from sqlalchemy import Index
+from sqlmodel import Field, SQLModel
+
+ISSUE_CREATED = "issue_created"
+COLLABORATOR_ADDED = "collaborator_added"
+
+
+class IssueChange(SQLModel, table=True):
+    """Issueの変更を通知するためのアウトボックス。
+
+    作成・共有と同じトランザクションで、一覧が変わるユーザーごとに1行を追加する。
+    idは単調増加し(SQLiteではAUTOINCREMENTで再利用しない)、クライアントのカーソルになる。
+    """
+
+    __tablename__ = "issue_changes"
+    __table_args__ = (
+        Index("ix_issue_changes_user_id_id", "user_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    user_id: int = Field(foreign_key="users.id")
+    issue_id: int = Field(foreign_key="issues.id")
+    kind: str
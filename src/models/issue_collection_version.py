@@ -0,0 +1,14 @@
+from typing import Optional
+
+from sqlmodel import Field, SQLModel
+
+
+class IssueCollectionVersion(SQLModel, table=True):
+    """ユーザーから見えるIssueの集合が変わるたびに増えるバージョン。ETagの算出に用いる。"""
+
+    __tablename__ = "issue_collection_versions"
+
+    user_id: Optional[int] = Field(
+        default=None, foreign_key="users.id", primary_key=True
+    )
+    version: int = Field(default=0)
@@ -0,0 +1,28 @@
+from typing import Any, Optional
+
+from sqlalchemy import JSON, Index
+from sqlmodel import Field, SQLModel
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_FAILED = "failed"
+
+
+class Job(SQLModel, table=True):
+    """コミット後に実行する処理のキュー。
+
+    成功したジョブは削除し、再試行を使い切ったジョブはfailedとして残す。
+    run_at(UNIX時刻)は、pendingなら実行予定時刻、runningならリースの期限を表す。
+    """
+
+    __tablename__ = "jobs"
+    __table_args__ = (Index("ix_jobs_status_run_at", "status", "run_at"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    name: str
+    payload: dict[str, Any] = Field(default_factory=dict, sa_type=JSON)
+    status: str = JOB_PENDING
+    attempts: int = 0
+    max_attempts: int
+    run_at: float
+    last_error: Optional[str] = None
@@ -1,43 +1,50 @@
-from sqlalchemy import or_
-from sqlmodel import Session, select
+from sqlmodel import select
 
 from src.models.issue import Issue
+from src.models.issue_access import IssueAccess
 from src.models.user import User
-from src.models.collaborator import Collaborator
+from src.protocols.issue import CollaboratorMembershipProtocol
 
 
 class IssuePolicy:
-    def __init__(self, user: User):
+    def __init__(self, user: User, membership: CollaboratorMembershipProtocol | None = None):
         self.user = user
+        self.membership = membership
 
     def can_create(self) -> bool:
         return self.user is not None
 
-    def can_update(self, issue: Issue) -> bool:
-        is_owner = self.user.id == issue.owner_id
-        is_collaborator = self.user in issue.collaborators
-        return is_owner or is_collaborator
+    async def can_update(self, issue: Issue) -> bool:
+        if self.user.id == issue.owner_id:
+            return True
+        return await self._is_collaborator(issue, self.user)
 
     def can_delete(self, issue: Issue) -> bool:
         return self.user.id == issue.owner_id
 
-    def can_add_collaborator(self, issue: Issue, user_to_add: User) -> bool:
-        if self.user.id != issue.owner_id:
+    def can_manage_collaborators(self, issue: Issue) -> bool:
+        return self.user.id == issue.owner_id
+
+    async def can_add_collaborator(self, issue: Issue, user_to_add: User) -> bool:
+        if not self.can_manage_collaborators(issue):
             return False
         
         if user_to_add.id == issue.owner_id:
             return False
 
-        if user_to_add in issue.collaborators:
+        if await self._is_collaborator(issue, user_to_add):
             return False
             
         return True
 
     def resolve_scope(self):
-        return or_(
-            Issue.owner_id == self.user.id,
-            Issue.id.in_(
-                select(Collaborator.issue_id).where(Collaborator.user_id == self.user.id)
-            )
+        # 所有と共有を展開したissue_accessを、主キーの先頭(user_id)で範囲検索する
+        return Issue.id.in_(
+            select(IssueAccess.issue_id).where(IssueAccess.user_id == self.user.id)
         )
 
+    async def _is_collaborator(self, issue: Issue, user: User) -> bool:
+        if self.membership is None:
+            raise ValueError("IssuePolicy requires a membership lookup for this check")
+        return await self.membership.is_collaborator(issue_id=issue.id, user_id=user.id)
+
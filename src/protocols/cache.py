@@ -0,0 +1,28 @@
+from dataclasses import dataclass
+from typing import Protocol, Sequence
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+
+@dataclass(frozen=True)
+class CacheLookup:
+    response: CachedResponse | None
+    # 参照時点の世代。setに渡し、その間に無効化されていれば書き込まない
+    generation: int
+
+
+class ResponseCacheProtocol(Protocol):
+    async def get(self, *, principal_id: int, key: str) -> CacheLookup:
+        ...
+
+    async def set(
+        self, *, principal_id: int, key: str, generation: int, response: CachedResponse
+    ) -> None:
+        ...
+
+    async def invalidate(self, *, principal_ids: Sequence[int]) -> None:
+        ...
@@ -0,0 +1,15 @@
+from contextlib import AbstractAsyncContextManager
+from typing import Protocol
+
+
+class ChangeSubscriptionProtocol(Protocol):
+    async def wait(self, *, timeout: float) -> bool:
+        """通知があればTrue、timeout秒までに通知がなければFalseを返す。"""
+        ...
+
+
+class ChangeFeedProtocol(Protocol):
+    def subscribe(
+        self, *, user_id: int
+    ) -> AbstractAsyncContextManager[ChangeSubscriptionProtocol]:
+        ...
@@ -1,21 +1,112 @@
-from typing import Any, Protocol, Sequence
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Protocol, Sequence
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.models.issue import Issue
+from src.models.issue_change import IssueChange
 from src.models.user import User
-from src.schemas.issue import IssueCreate
+from src.schemas.issue import IssueCreate, IssueRead
 
 
-class IssueRepositoryProtocol(Protocol):
-    def get_by_id(self, session: Session, *, id: int) -> Issue | None:
+@dataclass(frozen=True)
+class IssueLoadPlan:
+    owner: bool = False
+    collaborators: bool = False
+
+
+@dataclass(frozen=True)
+class IssueAccessDrift:
+    """issue_accessと導出元とのずれ。各要素は(user_id, issue_id, role)。"""
+
+    missing: list[tuple[int, int, str]]
+    unexpected: list[tuple[int, int, str]]
+
+
+class IssueAccessMaintenanceProtocol(Protocol):
+    """CLIやデータ生成スクリプトから使う、issue_accessの再構築と検査。"""
+
+    def rebuild_access(self, session: Session) -> int:
+        ...
+
+    def find_access_drift(self, session: Session, *, limit: int = 100) -> IssueAccessDrift:
+        ...
+
+
+class CollaboratorMembershipProtocol(Protocol):
+    async def is_collaborator(self, *, issue_id: int, user_id: int) -> bool:
+        ...
+
+    async def prefetch(self, *, issue_id: int, user_ids: Sequence[int]) -> None:
+        ...
+
+
+class AsyncIssueRepositoryProtocol(Protocol):
+    async def get_by_id(
+        self, session: AsyncSession, *, id: int, load_plan: IssueLoadPlan | None = None
+    ) -> Issue | None:
+        ...
+
+    async def find_read_page_by_scope(
+        self, session: AsyncSession, *, scope: Any, limit: int, after_id: int | None = None
+    ) -> list[IssueRead]:
         ...
 
-    def find_by_scope(self, session: Session, *, scope: Any) -> Sequence[Issue]:
+    def iter_read_by_scope(
+        self, session: AsyncSession, *, scope: Any, chunk_size: int
+    ) -> AsyncIterator[IssueRead]:
         ...
 
-    def create(self, session: Session, *, issue_create: IssueCreate, owner_id: int) -> Issue:
+    async def search_by_scope(
+        self,
+        session: AsyncSession,
+        *,
+        scope: Any,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        load_plan: IssueLoadPlan | None = None,
+    ) -> Sequence[Issue]:
         ...
 
-    def add_collaborator(self, session: Session, *, issue: Issue, user: User) -> None:
+    async def create(
+        self, session: AsyncSession, *, issue_create: IssueCreate, owner_id: int
+    ) -> Issue:
         ...
 
+    async def bulk_create(
+        self, session: AsyncSession, *, issue_creates: Sequence[IssueCreate], owner_id: int
+    ) -> list[int]:
+        ...
+
+    async def is_collaborator(self, session: AsyncSession, *, issue_id: int, user_id: int) -> bool:
+        ...
+
+    async def find_collaborator_ids(
+        self, session: AsyncSession, *, issue_id: int, user_ids: Sequence[int]
+    ) -> set[int]:
+        ...
+
+    async def add_collaborator(self, session: AsyncSession, *, issue: Issue, user: User) -> None:
+        ...
+
+    async def add_collaborators(
+        self, session: AsyncSession, *, issue_id: int, user_ids: Sequence[int]
+    ) -> None:
+        ...
+
+    async def get_collection_version(self, session: AsyncSession, *, user_id: int) -> int:
+        ...
+
+    async def find_changes(
+        self, session: AsyncSession, *, user_id: int, after_id: int, limit: int
+    ) -> Sequence[IssueChange]:
+        ...
+
+    async def find_changes_after(
+        self, session: AsyncSession, *, after_id: int, limit: int
+    ) -> Sequence[IssueChange]:
+        ...
+
+    async def get_latest_change_id(self, session: AsyncSession) -> int:
+        ...
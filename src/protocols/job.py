@@ -0,0 +1,20 @@
+from typing import Any, Mapping, Protocol
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+class JobQueueProtocol(Protocol):
+    async def enqueue(
+        self,
+        session: AsyncSession,
+        *,
+        name: str,
+        payload: Mapping[str, Any],
+        delay: float = 0.0,
+    ) -> int:
+        """ジョブをsessionに追加し、そのidを返す。
+
+        コミットは呼び出し側が行い、ジョブは業務データと同じトランザクションで確定する。
+        コミットされたジョブはdelay秒後以降にワーカーで実行される。
+        """
+        ...
@@ -0,0 +1,9 @@
+from typing import Protocol
+
+
+class PasswordHasherProtocol(Protocol):
+    async def hash(self, password: str) -> str:
+        ...
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        ...
@@ -1,16 +1,41 @@
-from typing import Protocol
+from typing import Protocol, Sequence
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.models.user import User
 from src.schemas.user import UserCreate
 
 
-class UserRepositoryProtocol(Protocol):
-    def get_by_id(self, session: Session, *, id: int) -> User | None:
+class UserImportRepositoryProtocol(Protocol):
+    """import-usersコマンドが使う、チャンク単位の照会と一括作成。"""
+
+    def find_existing_emails(self, session: Session, *, emails: Sequence[str]) -> set[str]:
+        ...
+
+    def bulk_create(
+        self,
+        session: Session,
+        *,
+        user_creates: Sequence[UserCreate],
+        hashed_passwords: Sequence[str],
+    ) -> int:
+        ...
+
+
+class AsyncUserRepositoryProtocol(Protocol):
+    async def get_by_id(self, session: AsyncSession, *, id: int) -> User | None:
+        ...
+
+    async def get_by_ids(self, session: AsyncSession, *, ids: Sequence[int]) -> Sequence[User]:
+        ...
+
+    async def get_principal(self, session: AsyncSession, *, id: int) -> User | None:
         ...
 
-    def get_by_email(self, session: Session, *, email: str) -> User | None:
+    async def get_by_email(self, session: AsyncSession, *, email: str) -> User | None:
         ...
 
-    def create(self, session: Session, *, user_create: UserCreate, hashed_password: str) -> User:
+    async def create(
+        self, session: AsyncSession, *, user_create: UserCreate, hashed_password: str
+    ) -> User:
         ...
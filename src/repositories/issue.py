@@ -1,33 +1,397 @@
-from typing import Any, Sequence
+from typing import Any, AsyncIterator, Sequence
+from sqlalchemy import (
+    and_,
+    column,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    table,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload, selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.models.collaborator import Collaborator
 from src.models.issue import Issue
+from src.models.issue_access import COLLABORATOR_ROLE, OWNER_ROLE, IssueAccess
+from src.models.issue_change import COLLABORATOR_ADDED, ISSUE_CREATED, IssueChange
+from src.models.issue_collection_version import IssueCollectionVersion
 from src.models.user import User
-from src.schemas.issue import IssueCreate
+from src.protocols.issue import IssueAccessDrift, IssueLoadPlan
+from src.schemas.issue import IssueCreate, IssueRead
+from src.schemas.user import UserRead
+
+
+# マイグレーションで作成されるFTS5の仮想テーブル(issuesを外部コンテンツとする)
+issues_fts = table("issues_fts", column("rowid"), column("rank"))
+
+
+def _search_terms_condition(query: str):
+    """FTS5のない方言向けに、各語をタイトルか本文に含むIssueに絞り込む条件を返す。"""
+    terms = query.split()
+    if not terms:
+        return None
+    return and_(
+        *(
+            or_(
+                Issue.title.icontains(term, autoescape=True),
+                Issue.description.icontains(term, autoescape=True),
+            )
+            for term in terms
+        )
+    )
+
+
+def to_fts_query(query: str) -> str:
+    """入力を語ごとのフレーズに変換し、FTS5の構文として解釈されないようにする。"""
+    terms = query.split()
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _issue_read_statement(scope: Any):
+    return (
+        select(
+            Issue.id,
+            Issue.title,
+            Issue.description,
+            Issue.owner_id,
+            User.email,
+            User.full_name,
+        )
+        .join(User, User.id == Issue.owner_id)
+        .where(scope)
+    )
+
+
+def _to_issue_read(row: Any) -> IssueRead:
+    # 行タプルから直接組み立て、ORMの生成とpydanticの検証を省略する
+    issue_id, title, description, owner_id, email, full_name = row
+    return IssueRead.model_construct(
+        id=issue_id,
+        title=title,
+        description=description,
+        owner_id=owner_id,
+        owner=UserRead.model_construct(id=owner_id, email=email, full_name=full_name),
+    )
+
+
+_UPSERT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+
+def _bump_collection_versions(dialect_name: str, user_ids: Sequence[int]):
+    """ユーザーごとのIssueコレクションのバージョンを1つ進めるUPSERT文とパラメータを返す。"""
+    statement = _UPSERT_INSERTS[dialect_name](IssueCollectionVersion).on_conflict_do_update(
+        index_elements=[IssueCollectionVersion.user_id],
+        set_={"version": IssueCollectionVersion.version + 1},
+    )
+    return statement, [{"user_id": user_id, "version": 1} for user_id in user_ids]
+
+
+def _expected_access():
+    """issuesとcollaboratorsから導出した、issue_accessにあるべき行。"""
+    return union_all(
+        select(
+            Issue.owner_id.label("user_id"),
+            Issue.id.label("issue_id"),
+            literal(OWNER_ROLE).label("role"),
+        ),
+        select(
+            Collaborator.user_id, Collaborator.issue_id, literal(COLLABORATOR_ROLE).label("role")
+        )
+        .join(Issue, Issue.id == Collaborator.issue_id)
+        .where(Collaborator.user_id != Issue.owner_id),
+    ).subquery()
+
+
+def _apply_load_plan(statement, load_plan: IssueLoadPlan | None):
+    if load_plan is None:
+        return statement
+    if load_plan.owner:
+        statement = statement.options(joinedload(Issue.owner))
+    if load_plan.collaborators:
+        statement = statement.options(selectinload(Issue.collaborators))
+    return statement
 
 
 class IssueRepository:
-    def get_by_id(self, session: Session, *, id: int) -> Issue | None:
-        return session.get(Issue, id)
+    def rebuild_access(self, session: Session) -> int:
+        """issue_accessを全件削除し、issuesとcollaboratorsから作り直す。作成した行数を返す。"""
+        expected = _expected_access()
+        session.exec(delete(IssueAccess))
+        session.exec(
+            insert(IssueAccess).from_select(
+                ["user_id", "issue_id", "role"],
+                select(expected.c.user_id, expected.c.issue_id, expected.c.role),
+            )
+        )
+        session.commit()
+        results = session.exec(select(func.count()).select_from(IssueAccess))
+        return results.one()
+
+    def find_access_drift(self, session: Session, *, limit: int = 100) -> IssueAccessDrift:
+        """issue_accessと導出元とのずれを、欠けている行と余分な行に分けて返す。"""
+        expected_access = _expected_access()
+        expected = select(
+            expected_access.c.user_id, expected_access.c.issue_id, expected_access.c.role
+        )
+        actual = select(IssueAccess.user_id, IssueAccess.issue_id, IssueAccess.role)
+        missing = session.exec(expected.except_(actual).limit(limit))
+        unexpected = session.exec(actual.except_(expected).limit(limit))
+        return IssueAccessDrift(
+            missing=[tuple(row) for row in missing],
+            unexpected=[tuple(row) for row in unexpected],
+        )
+
+
+BULK_INSERT_CHUNK_SIZE = 500
+
+
+class AsyncIssueRepository:
+    """書き込み系のメソッドはコミットしない。トランザクションの境界はユースケースが決める。"""
+
+    async def get_by_id(
+        self, session: AsyncSession, *, id: int, load_plan: IssueLoadPlan | None = None
+    ) -> Issue | None:
+        statement = _apply_load_plan(select(Issue).where(Issue.id == id), load_plan)
+        results = await session.exec(statement)
+        return results.first()
 
-    def find_by_scope(self, session: Session, *, scope: Any) -> Sequence[Issue]:
-        statement = select(Issue).where(scope)
-        results = session.exec(statement)
+    async def find_read_page_by_scope(
+        self, session: AsyncSession, *, scope: Any, limit: int, after_id: int | None = None
+    ) -> list[IssueRead]:
+        statement = _issue_read_statement(scope)
+        if after_id is not None:
+            statement = statement.where(Issue.id > after_id)
+        statement = statement.order_by(Issue.id).limit(limit)
+        results = await session.exec(statement)
+        return [_to_issue_read(row) for row in results]
+
+    async def iter_read_by_scope(
+        self, session: AsyncSession, *, scope: Any, chunk_size: int
+    ) -> AsyncIterator[IssueRead]:
+        statement = (
+            _issue_read_statement(scope)
+            .order_by(Issue.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        results = await session.stream(statement)
+        async for row in results:
+            yield _to_issue_read(row)
+
+    async def search_by_scope(
+        self,
+        session: AsyncSession,
+        *,
+        scope: Any,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        load_plan: IssueLoadPlan | None = None,
+    ) -> Sequence[Issue]:
+        """SQLiteではFTS5の関連度順、それ以外の方言ではタイトルと本文の部分一致をid順で返す。"""
+        if session.get_bind().dialect.name != "sqlite":
+            condition = _search_terms_condition(query)
+            if condition is None:
+                return []
+            statement = (
+                select(Issue)
+                .where(condition)
+                .where(scope)
+                .order_by(Issue.id)
+                .limit(limit)
+                .offset(offset)
+            )
+            statement = _apply_load_plan(statement, load_plan)
+            results = await session.exec(statement)
+            return results.all()
+
+        fts_query = to_fts_query(query)
+        if not fts_query:
+            return []
+
+        statement = (
+            select(Issue)
+            .join(issues_fts, issues_fts.c.rowid == Issue.id)
+            .where(literal_column("issues_fts").op("MATCH")(fts_query))
+            .where(scope)
+            .order_by(issues_fts.c.rank, Issue.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        statement = _apply_load_plan(statement, load_plan)
+        results = await session.exec(statement)
         return results.all()
 
-    def create(self, session: Session, *, issue_create: IssueCreate, owner_id: int) -> Issue:
+    async def create(
+        self, session: AsyncSession, *, issue_create: IssueCreate, owner_id: int
+    ) -> Issue:
         issue_data = issue_create.model_dump()
 
         new_issue = Issue(**issue_data, owner_id=owner_id)
 
         session.add(new_issue)
-        session.commit()
-        session.refresh(new_issue)
+        # issue_accessの行にidが必要なため、先にINSERTを発行する
+        await session.flush()
+        session.add(IssueAccess(user_id=owner_id, issue_id=new_issue.id, role=OWNER_ROLE))
+        session.add(IssueChange(user_id=owner_id, issue_id=new_issue.id, kind=ISSUE_CREATED))
+        await self._bump_collection_versions(session, user_ids=[owner_id])
+        await session.refresh(new_issue, attribute_names=["owner"])
 
         return new_issue
 
-    def add_collaborator(self, session: Session, *, issue: Issue, user: User) -> None:
-        issue.collaborators.append(user)
-        session.add(issue)
-        session.commit()
-        session.refresh(issue)
+    async def bulk_create(
+        self, session: AsyncSession, *, issue_creates: Sequence[IssueCreate], owner_id: int
+    ) -> list[int]:
+        statement = insert(Issue).returning(Issue.id)
+        ids: list[int] = []
+
+        # 全件を1トランザクションで挿入し、executemanyはチャンク単位で発行する
+        for start in range(0, len(issue_creates), BULK_INSERT_CHUNK_SIZE):
+            chunk = issue_creates[start:start + BULK_INSERT_CHUNK_SIZE]
+            rows = [{**issue_create.model_dump(), "owner_id": owner_id} for issue_create in chunk]
+            results = await session.exec(statement, params=rows)
+            # sort_by_parameter_order=Trueは1行ずつのINSERTに退化するため使わない。
+            # 採番は挿入順に単調増加するので、昇順に並べれば入力順と一致する
+            chunk_ids = sorted(results.scalars().all())
+            await session.exec(
+                insert(IssueAccess),
+                params=[
+                    {"user_id": owner_id, "issue_id": issue_id, "role": OWNER_ROLE}
+                    for issue_id in chunk_ids
+                ],
+            )
+            await session.exec(
+                insert(IssueChange),
+                params=[
+                    {"user_id": owner_id, "issue_id": issue_id, "kind": ISSUE_CREATED}
+                    for issue_id in chunk_ids
+                ],
+            )
+            ids.extend(chunk_ids)
+
+        await self._bump_collection_versions(session, user_ids=[owner_id])
+        return ids
+
+    async def is_collaborator(self, session: AsyncSession, *, issue_id: int, user_id: int) -> bool:
+        # issue_accessの主キー(user_id, issue_id)の点検索で判定する
+        statement = select(
+            exists().where(
+                IssueAccess.user_id == user_id,
+                IssueAccess.issue_id == issue_id,
+                IssueAccess.role == COLLABORATOR_ROLE,
+            )
+        )
+        results = await session.exec(statement)
+        return bool(results.one())
+
+    async def find_collaborator_ids(
+        self, session: AsyncSession, *, issue_id: int, user_ids: Sequence[int]
+    ) -> set[int]:
+        statement = select(IssueAccess.user_id).where(
+            IssueAccess.user_id.in_(user_ids),
+            IssueAccess.issue_id == issue_id,
+            IssueAccess.role == COLLABORATOR_ROLE,
+        )
+        results = await session.exec(statement)
+        return set(results.all())
+
+    async def add_collaborator(self, session: AsyncSession, *, issue: Issue, user: User) -> None:
+        # issue.collaboratorsを読み込まず、関連テーブルへ直接行を追加する
+        session.add(Collaborator(issue_id=issue.id, user_id=user.id))
+        session.add(IssueAccess(user_id=user.id, issue_id=issue.id, role=COLLABORATOR_ROLE))
+        session.add(IssueChange(user_id=user.id, issue_id=issue.id, kind=COLLABORATOR_ADDED))
+        await self._bump_collection_versions(session, user_ids=[user.id])
+
+    async def add_collaborators(
+        self, session: AsyncSession, *, issue_id: int, user_ids: Sequence[int]
+    ) -> None:
+        if not user_ids:
+            return
+        rows = [{"issue_id": issue_id, "user_id": user_id} for user_id in user_ids]
+        await session.exec(insert(Collaborator), params=rows)
+        await session.exec(
+            insert(IssueAccess),
+            params=[{**row, "role": COLLABORATOR_ROLE} for row in rows],
+        )
+        await session.exec(
+            insert(IssueChange),
+            params=[{**row, "kind": COLLABORATOR_ADDED} for row in rows],
+        )
+        await self._bump_collection_versions(session, user_ids=user_ids)
+
+    async def get_collection_version(self, session: AsyncSession, *, user_id: int) -> int:
+        statement = select(IssueCollectionVersion.version).where(
+            IssueCollectionVersion.user_id == user_id
+        )
+        results = await session.exec(statement)
+        return results.first() or 0
+
+    async def find_changes(
+        self, session: AsyncSession, *, user_id: int, after_id: int, limit: int
+    ) -> Sequence[IssueChange]:
+        statement = (
+            select(IssueChange)
+            .where(IssueChange.user_id == user_id, IssueChange.id > after_id)
+            .order_by(IssueChange.id)
+            .limit(limit)
+        )
+        results = await session.exec(statement)
+        return results.all()
+
+    async def find_changes_after(
+        self, session: AsyncSession, *, after_id: int, limit: int
+    ) -> Sequence[IssueChange]:
+        statement = (
+            select(IssueChange)
+            .where(IssueChange.id > after_id)
+            .order_by(IssueChange.id)
+            .limit(limit)
+        )
+        results = await session.exec(statement)
+        return results.all()
+
+    async def get_latest_change_id(self, session: AsyncSession) -> int:
+        results = await session.exec(select(func.max(IssueChange.id)))
+        return results.one() or 0
+
+    async def _bump_collection_versions(
+        self, session: AsyncSession, *, user_ids: Sequence[int]
+    ) -> None:
+        # 作成・共有と同じトランザクションで進め、データとバージョンがずれないようにする
+        statement, params = _bump_collection_versions(session.get_bind().dialect.name, user_ids)
+        await session.exec(statement, params=params)
+
+
+class AsyncCollaboratorMembership:
+    """リクエスト単位でコラボレーター判定の結果をメモ化する。"""
+
+    def __init__(self, session: AsyncSession, issue_repository: AsyncIssueRepository):
+        self.session = session
+        self.issue_repository = issue_repository
+        self._memo: dict[tuple[int, int], bool] = {}
+
+    async def is_collaborator(self, *, issue_id: int, user_id: int) -> bool:
+        key = (issue_id, user_id)
+        if key not in self._memo:
+            self._memo[key] = await self.issue_repository.is_collaborator(
+                self.session, issue_id=issue_id, user_id=user_id
+            )
+        return self._memo[key]
+
+    async def prefetch(self, *, issue_id: int, user_ids: Sequence[int]) -> None:
+        """複数ユーザーの判定結果を1回のINクエリでまとめて取得しておく。"""
+        missing = [user_id for user_id in user_ids if (issue_id, user_id) not in self._memo]
+        if not missing:
+            return
+        collaborator_ids = await self.issue_repository.find_collaborator_ids(
+            self.session, issue_id=issue_id, user_ids=missing
+        )
+        for user_id in missing:
+            self._memo[(issue_id, user_id)] = user_id in collaborator_ids
@@ -0,0 +1,79 @@
+from typing import Any, Sequence
+
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.models.job import JOB_FAILED, JOB_PENDING, JOB_RUNNING, Job
+
+
+class AsyncJobRepository:
+    async def create(
+        self,
+        session: AsyncSession,
+        *,
+        name: str,
+        payload: dict[str, Any],
+        run_at: float,
+        max_attempts: int,
+    ) -> Job:
+        """ジョブを追加してidを採番する。コミットは呼び出し側が業務データとあわせて行う。"""
+        job = Job(name=name, payload=payload, run_at=run_at, max_attempts=max_attempts)
+        session.add(job)
+        await session.flush()
+        return job
+
+    async def claim_due(
+        self, session: AsyncSession, *, now: float, lease_until: float, limit: int
+    ) -> Sequence[Job]:
+        """実行時刻を過ぎたジョブ(リースが切れた実行中のものを含む)を取得し、runningにする。
+
+        選択と更新を1文で行うため、複数のプロセスが同じジョブを取得することはない。
+        """
+        due = (
+            select(Job.id)
+            .where(Job.status.in_([JOB_PENDING, JOB_RUNNING]), Job.run_at <= now)
+            .order_by(Job.run_at, Job.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        statement = (
+            update(Job)
+            .where(Job.id.in_(due))
+            .values(status=JOB_RUNNING, attempts=Job.attempts + 1, run_at=lease_until)
+            .returning(Job)
+        )
+        results = await session.exec(statement)
+        jobs = results.scalars().all()
+        await session.commit()
+        return sorted(jobs, key=lambda job: job.id)
+
+    async def complete(self, session: AsyncSession, *, id: int) -> None:
+        await session.exec(delete(Job).where(Job.id == id))
+        await session.commit()
+
+    async def retry(self, session: AsyncSession, *, id: int, run_at: float, error: str) -> None:
+        statement = (
+            update(Job)
+            .where(Job.id == id)
+            .values(status=JOB_PENDING, run_at=run_at, last_error=error)
+        )
+        await session.exec(statement)
+        await session.commit()
+
+    async def fail(self, session: AsyncSession, *, id: int, error: str) -> None:
+        statement = update(Job).where(Job.id == id).values(status=JOB_FAILED, last_error=error)
+        await session.exec(statement)
+        await session.commit()
+
+    async def release(self, session: AsyncSession, *, ids: Sequence[int], run_at: float) -> None:
+        """実行せずに手放したジョブを、試行回数を戻してpendingに戻す。"""
+        if not ids:
+            return
+        statement = (
+            update(Job)
+            .where(Job.id.in_(ids))
+            .values(status=JOB_PENDING, attempts=Job.attempts - 1, run_at=run_at)
+        )
+        await session.exec(statement)
+        await session.commit()
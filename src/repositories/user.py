@@ -1,25 +1,99 @@
-from sqlmodel import Session
+from functools import lru_cache
+from typing import Any, Sequence
 
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import metrics
+from src.cache import TTLCache
 from src.models.user import User
 from src.schemas.user import UserCreate
+from src.settings import get_settings
+
+
+@lru_cache
+def get_principal_cache() -> TTLCache[int, dict[str, Any]]:
+    """認証済みユーザーのスナップショット(カラム値のみ)をuser_idで保持する。"""
+    settings = get_settings()
+    cache: TTLCache[int, dict[str, Any]] = TTLCache(
+        maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+        ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    )
+    metrics.register_cache("principal", cache)
+    return cache
+
+
+_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
 
 
 class UserRepository:
-    def get_by_id(self, session: Session, *, id: int) -> User | None:
-        return session.get(User, id)
+    def find_existing_emails(self, session: Session, *, emails: Sequence[str]) -> set[str]:
+        if not emails:
+            return set()
+        results = session.exec(select(User.email).where(User.email.in_(emails)))
+        return set(results.all())
+
+    def bulk_create(
+        self,
+        session: Session,
+        *,
+        user_creates: Sequence[UserCreate],
+        hashed_passwords: Sequence[str],
+    ) -> int:
+        """作成した件数を返す。照会後に別の経路で作られたメールは衝突として読み飛ばす。"""
+        if not user_creates:
+            return 0
+        rows = [
+            {**user_create.model_dump(exclude={"password"}), "hashed_password": hashed_password}
+            for user_create, hashed_password in zip(user_creates, hashed_passwords, strict=True)
+        ]
+        statement = (
+            _INSERTS[session.get_bind().dialect.name](User)
+            .on_conflict_do_nothing(index_elements=[User.email])
+            .returning(User.id)
+        )
+        created = len(session.exec(statement, params=rows).all())
+        session.commit()
+        return created
 
-    def get_by_email(self, session: Session, *, email: str) -> User | None:
-        return session.query(User).filter(User.email == email).first()
 
-    def create(self, session: Session, *, user_create: UserCreate, hashed_password: str) -> User:
+class AsyncUserRepository:
+    async def get_by_id(self, session: AsyncSession, *, id: int) -> User | None:
+        return await session.get(User, id)
+
+    async def get_by_ids(self, session: AsyncSession, *, ids: Sequence[int]) -> Sequence[User]:
+        results = await session.exec(select(User).where(User.id.in_(ids)))
+        return results.all()
+
+    async def get_principal(self, session: AsyncSession, *, id: int) -> User | None:
+        snapshot = get_principal_cache().get(id)
+        if snapshot is not None:
+            user = User(**snapshot)
+            make_transient_to_detached(user)
+            return await session.merge(user, load=False)
+
+        user = await session.get(User, id)
+        if user is not None:
+            get_principal_cache().set(id, user.model_dump())
+        return user
+
+    async def get_by_email(self, session: AsyncSession, *, email: str) -> User | None:
+        results = await session.exec(select(User).where(User.email == email))
+        return results.first()
+
+    async def create(
+        self, session: AsyncSession, *, user_create: UserCreate, hashed_password: str
+    ) -> User:
         user_data = user_create.model_dump()
-        
         user_data.pop("password", None)
 
         new_user = User(**user_data, hashed_password=hashed_password)
-        
+
         session.add(new_user)
-        session.commit()
-        session.refresh(new_user)
+        await session.commit()
+        await session.refresh(new_user)
 
         return new_user
@@ -0,0 +1,195 @@
+import asyncio
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Sequence
+
+from src.cache import TTLCache
+from src.protocols.cache import CachedResponse, CacheLookup, ResponseCacheProtocol
+from src.settings import get_settings
+
+
+class NullResponseCache:
+    """キャッシュを無効にする場合の実装。常にミスする。"""
+
+    async def get(self, *, principal_id: int, key: str) -> CacheLookup:
+        return CacheLookup(response=None, generation=0)
+
+    async def set(
+        self, *, principal_id: int, key: str, generation: int, response: CachedResponse
+    ) -> None:
+        pass
+
+    async def invalidate(self, *, principal_ids: Sequence[int]) -> None:
+        pass
+
+
+class InMemoryResponseCache:
+    """プロセス内のLRUキャッシュ。ワーカー間では共有されないため、単一プロセス向け。
+
+    無効化はプリンシパルの世代を進めるだけで行い、古い世代のエントリはLRUとTTLで追い出す。
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float):
+        self._entries: TTLCache[tuple[int, int, str], CachedResponse] = TTLCache(
+            maxsize=maxsize, ttl=ttl
+        )
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, *, principal_id: int, key: str) -> CacheLookup:
+        generation = self._generations.get(principal_id, 0)
+        response = self._entries.get((principal_id, generation, key))
+        return CacheLookup(response=response, generation=generation)
+
+    async def set(
+        self, *, principal_id: int, key: str, generation: int, response: CachedResponse
+    ) -> None:
+        if self._generations.get(principal_id, 0) != generation:
+            return
+        self._entries.set((principal_id, generation, key), response)
+
+    async def invalidate(self, *, principal_ids: Sequence[int]) -> None:
+        with self._lock:
+            for principal_id in principal_ids:
+                self._generations[principal_id] = self._generations.get(principal_id, 0) + 1
+
+
+class SQLiteResponseCache:
+    """SQLiteファイルに保存するキャッシュ。同じファイルを指す複数のワーカーで共有できる。
+
+    sqlite3の呼び出しはスレッドプールで実行し、イベントループを塞がない。
+    """
+
+    PURGE_INTERVAL = 256
+
+    def __init__(self, *, path: str, ttl: float):
+        self.path = path
+        self.ttl = ttl
+        self._local = threading.local()
+        self._sets = 0
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS response_cache_generations (
+                    principal_id INTEGER PRIMARY KEY,
+                    generation INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS response_cache_entries (
+                    principal_id INTEGER NOT NULL,
+                    key TEXT NOT NULL,
+                    generation INTEGER NOT NULL,
+                    body BLOB NOT NULL,
+                    etag TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (principal_id, key)
+                ) WITHOUT ROWID;
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+        connection.execute("PRAGMA journal_mode = WAL")
+        connection.execute("PRAGMA synchronous = NORMAL")
+        return connection
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def _get(self, principal_id: int, key: str) -> CacheLookup:
+        row = self._connection().execute(
+            """
+            SELECT
+                COALESCE(g.generation, 0),
+                e.generation,
+                e.body,
+                e.etag,
+                e.expires_at
+            FROM (SELECT ? AS principal_id) AS p
+            LEFT JOIN response_cache_generations AS g ON g.principal_id = p.principal_id
+            LEFT JOIN response_cache_entries AS e
+                ON e.principal_id = p.principal_id AND e.key = ?
+            """,
+            (principal_id, key),
+        ).fetchone()
+        generation, entry_generation, body, etag, expires_at = row
+        if body is None or entry_generation != generation or expires_at <= time.time():
+            return CacheLookup(response=None, generation=generation)
+        return CacheLookup(response=CachedResponse(body=body, etag=etag), generation=generation)
+
+    def _set(self, principal_id: int, key: str, generation: int, response: CachedResponse) -> None:
+        connection = self._connection()
+        # 参照後に無効化されていれば(世代が進んでいれば)書き込まない
+        connection.execute(
+            """
+            INSERT OR REPLACE INTO response_cache_entries
+                (principal_id, key, generation, body, etag, expires_at)
+            SELECT ?, ?, ?, ?, ?, ?
+            WHERE COALESCE(
+                (SELECT generation FROM response_cache_generations WHERE principal_id = ?), 0
+            ) = ?
+            """,
+            (
+                principal_id,
+                key,
+                generation,
+                response.body,
+                response.etag,
+                time.time() + self.ttl,
+                principal_id,
+                generation,
+            ),
+        )
+        self._sets += 1
+        if self._sets % self.PURGE_INTERVAL == 0:
+            connection.execute(
+                "DELETE FROM response_cache_entries WHERE expires_at <= ?", (time.time(),)
+            )
+
+    def _invalidate(self, principal_ids: Sequence[int]) -> None:
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(
+                """
+                INSERT INTO response_cache_generations (principal_id, generation) VALUES (?, 1)
+                ON CONFLICT (principal_id) DO UPDATE SET generation = generation + 1
+                """,
+                [(principal_id,) for principal_id in principal_ids],
+            )
+            connection.executemany(
+                "DELETE FROM response_cache_entries WHERE principal_id = ?",
+                [(principal_id,) for principal_id in principal_ids],
+            )
+
+    async def get(self, *, principal_id: int, key: str) -> CacheLookup:
+        return await asyncio.to_thread(self._get, principal_id, key)
+
+    async def set(
+        self, *, principal_id: int, key: str, generation: int, response: CachedResponse
+    ) -> None:
+        await asyncio.to_thread(self._set, principal_id, key, generation, response)
+
+    async def invalidate(self, *, principal_ids: Sequence[int]) -> None:
+        if principal_ids:
+            await asyncio.to_thread(self._invalidate, principal_ids)
+
+
+@lru_cache
+def get_response_cache() -> ResponseCacheProtocol:
+    settings = get_settings()
+    if settings.RESPONSE_CACHE_BACKEND == "memory":
+        return InMemoryResponseCache(
+            maxsize=settings.RESPONSE_CACHE_MAX_SIZE, ttl=settings.RESPONSE_CACHE_TTL_SECONDS
+        )
+    if settings.RESPONSE_CACHE_BACKEND == "sqlite":
+        return SQLiteResponseCache(
+            path=settings.RESPONSE_CACHE_SQLITE_PATH, ttl=settings.RESPONSE_CACHE_TTL_SECONDS
+        )
+    return NullResponseCache()
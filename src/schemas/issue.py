@@ -1,6 +1,6 @@
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from .user import UserRead
 
@@ -14,12 +14,53 @@ class IssueCreate(IssueBase):
     pass
 
 
+class IssueBulkCreate(BaseModel):
+    items: list[IssueCreate] = Field(min_length=1, max_length=10000)
+
+
+class IssueBulkCreateResult(BaseModel):
+    ids: list[int]
+
+
 class IssueRead(IssueBase):
     id: int
     owner_id: int
     owner: UserRead
 
 
+class IssuePage(BaseModel):
+    items: list[IssueRead]
+    next_cursor: Optional[str] = None
+
+
+class IssueSearchPage(BaseModel):
+    items: list[IssueRead]
+    next_offset: Optional[int] = None
+
+
+class CollaboratorBatchCreate(BaseModel):
+    user_ids: list[int] = Field(min_length=1, max_length=1000)
+
+
+class CollaboratorBatchResult(BaseModel):
+    added: list[int]
+    already_collaborators: list[int]
+    rejected: list[int]
+    not_found: list[int]
+
+
+class IssueChangeRead(BaseModel):
+    id: int
+    issue_id: int
+    kind: str
+
+
+class IssueChangePage(BaseModel):
+    items: list[IssueChangeRead]
+    # 次回のsinceに渡す値。変更がなければ受け取ったsinceをそのまま返す
+    next_since: int
+
+
 class IssueUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
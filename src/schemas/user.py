@@ -19,3 +19,10 @@ class UserUpdate(BaseModel):
     email: Optional[str] = None
     full_name: Optional[str] = None
     password: Optional[str] = Field(default=None, min_length=8)
+
+
+class UserImportResult(BaseModel):
+    created: int
+    already_exists: int
+    duplicates: int
+    conflicts: int
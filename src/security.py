@@ -1,15 +1,39 @@
+import asyncio
+import hashlib
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from functools import lru_cache
+from typing import Any, Callable, TypeVar
 
 from jose import jwt
 from passlib.context import CryptContext
 
-from src.settings import settings
+from src import metrics
+from src.cache import TTLCache
+from src.schemas.token import TokenPayload
+from src.settings import get_settings
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
+
+@lru_cache
+def get_token_cache() -> TTLCache[bytes, TokenPayload]:
+    """検証済みトークンのSHA-256ダイジェストをキーに、デコード結果を有効期限まで保持する。"""
+    settings = get_settings()
+    cache: TTLCache[bytes, TokenPayload] = TTLCache(
+        maxsize=settings.TOKEN_CACHE_MAX_SIZE,
+        ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+    metrics.register_cache("token", cache)
+    return cache
+
 
 def create_access_token(subject: str | Any, expires_delta: timedelta | None = None) -> str:
+    settings = get_settings()
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
@@ -21,9 +45,106 @@ def create_access_token(subject: str | Any, expires_delta: timedelta | None = No
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> TokenPayload:
+    key = hashlib.sha256(token.encode()).digest()
+    token_cache = get_token_cache()
+    cached = token_cache.get(key)
+    if cached is not None:
+        return cached
+
+    settings = get_settings()
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    token_data = TokenPayload(**payload)
+
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        remaining = exp - time.time()
+        if remaining > 0:
+            token_cache.set(key, token_data, ttl=min(remaining, token_cache.ttl))
+
+    return token_data
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def _timed(fn: Callable[..., T], *args: Any) -> tuple[T, float]:
+    # ワーカープロセス内で実行し、キュー待ちを含まないbcryptの計算時間を返す
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+class PasswordHasherSaturatedError(Exception):
+    def __init__(self, message: str, *, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """bcryptの計算をプロセスプールで実行し、イベントループとGILを解放する。
+
+    待機中の計算がmax_pendingに達した場合は、キューを伸ばさずに
+    PasswordHasherSaturatedErrorを送出して呼び出し側にバックプレッシャーを返す。
+    """
+
+    def __init__(self, *, max_workers: int, max_pending: int, retry_after: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit("verify", verify_password, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def _submit(self, operation: str, fn: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.max_pending:
+            raise PasswordHasherSaturatedError(
+                "Password hashing is saturated", retry_after=self.retry_after
+            )
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            submitted = time.perf_counter()
+            result, seconds = await loop.run_in_executor(self._get_executor(), _timed, fn, *args)
+            elapsed = time.perf_counter() - submitted
+            metrics.PASSWORD_HASH_SECONDS.labels(operation=operation).observe(seconds)
+            metrics.PASSWORD_HASH_QUEUE_SECONDS.labels(operation=operation).observe(
+                max(elapsed - seconds, 0.0)
+            )
+            return result
+        finally:
+            self._pending -= 1
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+
+@lru_cache
+def get_password_hasher() -> PasswordHasher:
+    settings = get_settings()
+    return PasswordHasher(
+        max_workers=settings.PASSWORD_HASH_WORKERS,
+        max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+        retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+    )
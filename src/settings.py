@@ -1,12 +1,62 @@
+from functools import lru_cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: str | None = None
+    READ_DATABASE_URL: str | None = None
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    SQLITE_JOURNAL_MODE: Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"] = "WAL"
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    SQLITE_CACHE_SIZE: int = -64000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_TEMP_STORE: Literal["DEFAULT", "FILE", "MEMORY"] = "MEMORY"
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 200.0
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_LOG_PATH: str = "logs/slow_queries.log"
+    SLOW_QUERY_LOG_MAX_BYTES: int = 10 * 1024 * 1024
+    SLOW_QUERY_LOG_BACKUP_COUNT: int = 5
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     COOKIE_SECURE: bool = False
     ALGORITHM: str = "HS256"
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 60.0
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    RESPONSE_CACHE_BACKEND: Literal["none", "memory", "sqlite"] = "none"
+    RESPONSE_CACHE_TTL_SECONDS: float = 30.0
+    RESPONSE_CACHE_MAX_SIZE: int = 10000
+    RESPONSE_CACHE_SQLITE_PATH: str = "data/response_cache.db"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 1
+    CHANGE_FEED_POLL_INTERVAL_SECONDS: float = 0.5
+    CHANGE_FEED_BATCH_SIZE: int = 1000
+    # 採番順とコミット順が入れ替わり得るDB(PostgreSQLなど)向けに、読み直す直近のid数
+    CHANGE_FEED_RESCAN_WINDOW: int = 100
+    CHANGE_FEED_MAX_WAIT_SECONDS: float = 25.0
+    CHANGE_FEED_HEARTBEAT_SECONDS: float = 15.0
+    JOB_RUNNER_ENABLED: bool = True
+    JOB_WORKERS: int = 4
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 1.0
+    JOB_RETRY_MAX_SECONDS: float = 300.0
+    JOB_LEASE_SECONDS: float = 300.0
+    JOB_DRAIN_TIMEOUT_SECONDS: float = 10.0
+
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """初回呼び出し時に環境変数と.envを読み込む。インポート時には読み込まない。"""
+    return Settings()
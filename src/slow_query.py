@@ -0,0 +1,107 @@
+import json
+import logging
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any
+
+from src import metrics
+from src.settings import get_settings
+
+logger = logging.getLogger("pysavor.slow_query")
+
+_EXPLAIN_PREFIXES = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+_SAFE_TYPES = (bool, int, float, type(None))
+
+
+class JSONFormatter(logging.Formatter):
+    """1レコード1行のJSONとして出力する。"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "message": record.getMessage(),
+            **getattr(record, "slow_query", {}),
+        }
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def _configure_logger() -> None:
+    if logger.handlers:
+        return
+    settings = get_settings()
+    path = Path(settings.SLOW_QUERY_LOG_PATH)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(
+        path,
+        maxBytes=settings.SLOW_QUERY_LOG_MAX_BYTES,
+        backupCount=settings.SLOW_QUERY_LOG_BACKUP_COUNT,
+        encoding="utf-8",
+    )
+    handler.setFormatter(JSONFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
+    logger.propagate = False
+
+
+def _redact_value(value: Any) -> Any:
+    # IDや件数などの数値は調査に必要なため残し、文字列やバイト列は型と長さのみ記録する
+    if isinstance(value, _SAFE_TYPES):
+        return value
+    if isinstance(value, (str, bytes)):
+        return f"<redacted {type(value).__name__} len={len(value)}>"
+    return f"<redacted {type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    if isinstance(parameters, dict):
+        return {key: _redact_value(value) for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+
+def explain(conn, statement: str, parameters: Any) -> list[str] | str | None:
+    """同じ接続で実行計画を取得する。イベントを経由しないようDBAPIのカーソルを直接使う。"""
+    prefix = _EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return [" ".join(str(column) for column in row) for row in cursor.fetchall()]
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        cursor.close()
+
+
+def _is_batch(parameters: Any) -> bool:
+    # insertmanyvaluesではexecutemanyでも1組のパラメータで実行されるため、形で判定する
+    return isinstance(parameters, list) and bool(parameters) and isinstance(
+        parameters[0], (list, tuple, dict)
+    )
+
+
+def log_slow_query(conn, statement: str, parameters: Any, *, seconds: float) -> None:
+    _configure_logger()
+    settings = get_settings()
+    request = metrics.current_request()
+    record: dict[str, Any] = {
+        "duration_ms": round(seconds * 1000, 3),
+        "threshold_ms": settings.SLOW_QUERY_THRESHOLD_MS,
+        "method": request.method if request else None,
+        "route": request.route if request else None,
+        "statement": statement,
+    }
+    if _is_batch(parameters):
+        record["executemany"] = len(parameters)
+        record["parameters"] = redact_parameters(parameters[0])
+    else:
+        record["parameters"] = redact_parameters(parameters)
+        if settings.SLOW_QUERY_EXPLAIN:
+            record["plan"] = explain(conn, statement, parameters)
+
+    logger.warning("slow query", extra={"slow_query": record})
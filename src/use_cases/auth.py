@@ -1,22 +1,28 @@
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src import security
-from src.protocols.user import UserRepositoryProtocol
-from .exceptions import AuthenticationError
+from src.protocols.security import PasswordHasherProtocol
+from src.protocols.user import AsyncUserRepositoryProtocol
+from .exceptions import AuthenticationError, ServiceUnavailableError
 
 
-def login(
-    session: Session,
+async def login(
+    session: AsyncSession,
     *,
-    user_repository: UserRepositoryProtocol,
+    user_repository: AsyncUserRepositoryProtocol,
+    password_hasher: PasswordHasherProtocol,
     email: str,
     password: str,
 ) -> str:
-    user = user_repository.get_by_email(session=session, email=email)
+    user = await user_repository.get_by_email(session=session, email=email)
     if not user:
         raise AuthenticationError("Incorrect email or password")
 
-    if not security.verify_password(password, user.hashed_password):
+    try:
+        verified = await password_hasher.verify(password, user.hashed_password)
+    except security.PasswordHasherSaturatedError as e:
+        raise ServiceUnavailableError(str(e), retry_after=e.retry_after) from e
+    if not verified:
         raise AuthenticationError("Incorrect email or password")
 
     access_token = security.create_access_token(subject=user.id)
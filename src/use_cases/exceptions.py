@@ -8,3 +8,13 @@ class UserAlreadyExistsError(UseCaseError):
 
 class AuthenticationError(UseCaseError):
     pass
+
+
+class InvalidCursorError(UseCaseError):
+    pass
+
+
+class ServiceUnavailableError(UseCaseError):
+    def __init__(self, message: str, *, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
@@ -1,40 +1,235 @@
-from sqlmodel import Session
+import asyncio
+from typing import AsyncIterator, Sequence
 
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src import pagination
 from src.models.issue import Issue
+from src.models.issue_change import IssueChange
 from src.models.user import User
-from src.protocols.issue import IssueRepositoryProtocol
-from src.schemas.issue import IssueCreate
+from src.protocols.cache import ResponseCacheProtocol
+from src.protocols.change_feed import ChangeSubscriptionProtocol
+from src.protocols.job import JobQueueProtocol
+from src.protocols.issue import (
+    AsyncIssueRepositoryProtocol,
+    CollaboratorMembershipProtocol,
+    IssueLoadPlan,
+)
+from src.protocols.user import AsyncUserRepositoryProtocol
+from src.schemas.issue import CollaboratorBatchResult, IssueCreate, IssueRead
 from src.policies.issue import IssuePolicy
 
+from .exceptions import InvalidCursorError
+
+# IssueReadはownerを埋め込むため、一覧系のユースケースではownerを一括で読み込む
+MY_ISSUES_LOAD_PLAN = IssueLoadPlan(owner=True)
+
+# 一覧が変わったユーザーの /issues/me の先頭ページを、コミット後にキャッシュへ載せ直すジョブ
+WARM_MY_ISSUES_JOB = "warm_my_issues"
 
-def create_issue(
-    session: Session,
+
+async def create_issue(
+    session: AsyncSession,
     *,
     current_user: User,
-    issue_repository: IssueRepositoryProtocol,
+    issue_repository: AsyncIssueRepositoryProtocol,
+    response_cache: ResponseCacheProtocol,
+    job_queue: JobQueueProtocol,
     issue_create: IssueCreate,
 ) -> Issue:
-    return issue_repository.create(
+    issue = await issue_repository.create(
         session=session, issue_create=issue_create, owner_id=current_user.id
     )
+    await job_queue.enqueue(
+        session, name=WARM_MY_ISSUES_JOB, payload={"user_ids": [current_user.id]}
+    )
+    await session.commit()
+    await response_cache.invalidate(principal_ids=[current_user.id])
+    return issue
+
+async def bulk_create_issues(
+    session: AsyncSession,
+    *,
+    current_user: User,
+    issue_repository: AsyncIssueRepositoryProtocol,
+    response_cache: ResponseCacheProtocol,
+    job_queue: JobQueueProtocol,
+    issue_creates: Sequence[IssueCreate],
+) -> list[int]:
+    ids = await issue_repository.bulk_create(
+        session=session, issue_creates=issue_creates, owner_id=current_user.id
+    )
+    await job_queue.enqueue(
+        session, name=WARM_MY_ISSUES_JOB, payload={"user_ids": [current_user.id]}
+    )
+    await session.commit()
+    await response_cache.invalidate(principal_ids=[current_user.id])
+    return ids
 
-def add_collaborator(
-    session: Session,
+async def add_collaborator(
+    session: AsyncSession,
     *,
-    issue_repository: IssueRepositoryProtocol,
+    issue_repository: AsyncIssueRepositoryProtocol,
+    response_cache: ResponseCacheProtocol,
+    job_queue: JobQueueProtocol,
     issue: Issue,
     user_to_add: User,
 ) -> Issue:
-    issue_repository.add_collaborator(session=session, issue=issue, user=user_to_add)
+    await issue_repository.add_collaborator(session=session, issue=issue, user=user_to_add)
+    await job_queue.enqueue(
+        session, name=WARM_MY_ISSUES_JOB, payload={"user_ids": [user_to_add.id]}
+    )
+    await session.commit()
+    # 共有されたユーザーから見える一覧が変わる
+    await response_cache.invalidate(principal_ids=[user_to_add.id])
     return issue
 
-def get_my_issues(
-    session: Session,
+async def add_collaborators(
+    session: AsyncSession,
+    *,
+    current_user: User,
+    issue_repository: AsyncIssueRepositoryProtocol,
+    user_repository: AsyncUserRepositoryProtocol,
+    membership: CollaboratorMembershipProtocol,
+    response_cache: ResponseCacheProtocol,
+    job_queue: JobQueueProtocol,
+    issue: Issue,
+    user_ids: Sequence[int],
+) -> CollaboratorBatchResult:
+    requested_ids = list(dict.fromkeys(user_ids))
+    users = await user_repository.get_by_ids(session=session, ids=requested_ids)
+    users_by_id = {user.id: user for user in users}
+    found_ids = [user_id for user_id in requested_ids if user_id in users_by_id]
+
+    # 既存のコラボレーターを1回のクエリで取得し、以降のポリシー判定はメモから引く
+    await membership.prefetch(issue_id=issue.id, user_ids=found_ids)
+    policy = IssuePolicy(user=current_user, membership=membership)
+
+    added: list[int] = []
+    already_collaborators: list[int] = []
+    rejected: list[int] = []
+    for user_id in found_ids:
+        if await membership.is_collaborator(issue_id=issue.id, user_id=user_id):
+            already_collaborators.append(user_id)
+        elif await policy.can_add_collaborator(issue=issue, user_to_add=users_by_id[user_id]):
+            added.append(user_id)
+        else:
+            rejected.append(user_id)
+
+    if added:
+        await issue_repository.add_collaborators(
+            session=session, issue_id=issue.id, user_ids=added
+        )
+        await job_queue.enqueue(session, name=WARM_MY_ISSUES_JOB, payload={"user_ids": added})
+        await session.commit()
+        await response_cache.invalidate(principal_ids=added)
+
+    return CollaboratorBatchResult(
+        added=added,
+        already_collaborators=already_collaborators,
+        rejected=rejected,
+        not_found=[user_id for user_id in requested_ids if user_id not in users_by_id],
+    )
+
+async def get_my_issues_version(
+    session: AsyncSession,
+    *,
+    current_user: User,
+    issue_repository: AsyncIssueRepositoryProtocol,
+) -> int:
+    return await issue_repository.get_collection_version(
+        session=session, user_id=current_user.id
+    )
+
+async def get_my_issues_page(
+    session: AsyncSession,
+    *,
+    current_user: User,
+    issue_repository: AsyncIssueRepositoryProtocol,
+    limit: int,
+    cursor: str | None = None,
+) -> tuple[Sequence[IssueRead], str | None]:
+    try:
+        after_id = pagination.decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise InvalidCursorError(str(e))
+
+    policy = IssuePolicy(user=current_user)
+    scope = policy.resolve_scope()
+
+    # 1件多く取得し、次のページの有無を判定する
+    issues = await issue_repository.find_read_page_by_scope(
+        session=session, scope=scope, limit=limit + 1, after_id=after_id
+    )
+    if len(issues) <= limit:
+        return issues, None
+
+    issues = issues[:limit]
+    return issues, pagination.encode_cursor(issues[-1].id)
+
+async def search_my_issues(
+    session: AsyncSession,
+    *,
+    current_user: User,
+    issue_repository: AsyncIssueRepositoryProtocol,
+    query: str,
+    limit: int,
+    offset: int = 0,
+) -> tuple[Sequence[Issue], int | None]:
+    policy = IssuePolicy(user=current_user)
+    scope = policy.resolve_scope()
+
+    issues = await issue_repository.search_by_scope(
+        session=session,
+        scope=scope,
+        query=query,
+        limit=limit + 1,
+        offset=offset,
+        load_plan=MY_ISSUES_LOAD_PLAN,
+    )
+    if len(issues) <= limit:
+        return issues, None
+
+    return issues[:limit], offset + limit
+
+def iter_my_issues(
+    session: AsyncSession,
     *,
     current_user: User,
-    issue_repository: IssueRepositoryProtocol,
-) -> list[Issue]:
+    issue_repository: AsyncIssueRepositoryProtocol,
+    chunk_size: int,
+) -> AsyncIterator[IssueRead]:
     policy = IssuePolicy(user=current_user)
     scope = policy.resolve_scope()
 
-    return issue_repository.find_by_scope(session=session, scope=scope)
+    return issue_repository.iter_read_by_scope(
+        session=session, scope=scope, chunk_size=chunk_size
+    )
+
+async def wait_for_issue_changes(
+    session: AsyncSession,
+    *,
+    current_user: User,
+    issue_repository: AsyncIssueRepositoryProtocol,
+    subscription: ChangeSubscriptionProtocol,
+    since: int,
+    limit: int,
+    timeout: float,
+) -> Sequence[IssueChange]:
+    """sinceより後の変更を返す。なければ通知を待ち、起こされるたびに取得し直す。
+
+    timeoutまでに変更がなければ空を返す。subscriptionは最初の取得より前に登録しておくこと。
+    """
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        changes = await issue_repository.find_changes(
+            session=session, user_id=current_user.id, after_id=since, limit=limit
+        )
+        # 待機中にDBの接続を保持しない(次の取得で取り直す)
+        await session.close()
+        if changes:
+            return changes
+
+        remaining = deadline - asyncio.get_running_loop().time()
+        if remaining <= 0 or not await subscription.wait(timeout=remaining):
+            return changes
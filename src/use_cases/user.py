@@ -1,28 +1,63 @@
+from typing import Callable, Sequence
+
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src import security
 from src.models.user import User
-from src.protocols.user import UserRepositoryProtocol
-from src.schemas.user import UserCreate
+from src.protocols.security import PasswordHasherProtocol
+from src.protocols.user import AsyncUserRepositoryProtocol, UserImportRepositoryProtocol
+from src.schemas.user import UserCreate, UserImportResult
 
-from .exceptions import UserAlreadyExistsError
+from .exceptions import ServiceUnavailableError, UserAlreadyExistsError
 
 
-def create_user(
-    session: Session,
+async def create_user(
+    session: AsyncSession,
     *,
-    user_repository: UserRepositoryProtocol,
+    user_repository: AsyncUserRepositoryProtocol,
+    password_hasher: PasswordHasherProtocol,
     user_create: UserCreate
 ) -> User:
-    existing_user = user_repository.get_by_email(session=session, email=user_create.email)
+    existing_user = await user_repository.get_by_email(session=session, email=user_create.email)
     if existing_user:
         raise UserAlreadyExistsError("User with this email already exists.")
 
-    hashed_password = security.get_password_hash(user_create.password)
+    try:
+        hashed_password = await password_hasher.hash(user_create.password)
+    except security.PasswordHasherSaturatedError as e:
+        raise ServiceUnavailableError(str(e), retry_after=e.retry_after) from e
 
-    new_user = user_repository.create(
+    new_user = await user_repository.create(
         session=session, user_create=user_create, hashed_password=hashed_password
     )
 
     return new_user
 
+def import_users(
+    session: Session,
+    *,
+    user_repository: UserImportRepositoryProtocol,
+    hash_passwords: Callable[[Sequence[str]], Sequence[str]],
+    user_creates: Sequence[UserCreate],
+) -> UserImportResult:
+    """1チャンク分のユーザーを作成する。既存メールの照会とINSERTはチャンクごとに1回で行う。"""
+    unique: dict[str, UserCreate] = {}
+    for user_create in user_creates:
+        unique.setdefault(user_create.email, user_create)
+
+    existing = user_repository.find_existing_emails(session=session, emails=list(unique))
+    to_create = [user_create for email, user_create in unique.items() if email not in existing]
+
+    # ハッシュは作成するユーザーの分だけ計算する
+    hashed_passwords = hash_passwords([user_create.password for user_create in to_create])
+    created = user_repository.bulk_create(
+        session=session, user_creates=to_create, hashed_passwords=hashed_passwords
+    )
+
+    return UserImportResult(
+        created=created,
+        already_exists=len(existing),
+        duplicates=len(user_creates) - len(unique),
+        conflicts=len(to_create) - created,
+    )